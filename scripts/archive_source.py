@@ -0,0 +1,76 @@
+import os
+import tarfile
+import zipfile
+import posixpath
+from typing import BinaryIO, List, Optional
+
+ARCHIVE_SUFFIXES = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+
+def is_archive(path) -> bool:
+    return os.path.isfile(path) and str(path).lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def _clean_member_name(name: str) -> Optional[str]:
+    name = posixpath.normpath(name.replace('\\', '/')).lstrip('/')
+    if name in ('', '.') or name == '..' or name.startswith('../'):
+        return None
+    return name
+
+
+class ArchiveSource:
+    def __init__(self, path):
+        self.path = str(path)
+        self.members = {}
+        self._zip = None
+        self._tar = None
+        
+        if zipfile.is_zipfile(self.path):
+            self._zip = zipfile.ZipFile(self.path)
+            for info in self._zip.infolist():
+                name = _clean_member_name(info.filename)
+                if name and not info.is_dir():
+                    self.members[name] = (info, info.file_size)
+        else:
+            self._tar = tarfile.open(self.path, 'r:*')
+            for info in self._tar:
+                name = _clean_member_name(info.name)
+                if name and info.isfile():
+                    self.members[name] = (info, info.size)
+        
+        self._strip_top_level()
+    
+    def _strip_top_level(self):
+        prefixes = {name.partition('/')[0] for name in self.members}
+        if len(prefixes) != 1 or any('/' not in name for name in self.members):
+            return
+        
+        prefix = prefixes.pop() + '/'
+        self.members = {name[len(prefix):]: member for name, member in self.members.items()}
+    
+    def list_files(self) -> List[str]:
+        return list(self.members)
+    
+    def size(self, name: str) -> int:
+        return self.members[name][1]
+    
+    def cache_key(self, name: str) -> Optional[str]:
+        return None
+    
+    def open(self, name: str) -> BinaryIO:
+        info = self.members[name][0]
+        if self._zip is not None:
+            return self._zip.open(info)
+        return self._tar.extractfile(info)
+    
+    def read(self, name: str) -> Optional[bytes]:
+        if name not in self.members:
+            return None
+        with self.open(name) as f:
+            return f.read()
+    
+    def close(self):
+        if self._zip is not None:
+            self._zip.close()
+        if self._tar is not None:
+            self._tar.close()
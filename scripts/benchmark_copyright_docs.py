@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import random
+import shutil
+import platform
+import time
+import functools
+import tracemalloc
+import multiprocessing
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Optional
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SPEC_SUFFIX = '.bench_spec.json'
+LAYOUTS = ('miniprogram', 'node', 'mixed')
+METRIC_DESCRIPTIONS = {
+    'wall_seconds': '阶段耗时（秒），在未开启 tracemalloc 的运行中测得',
+    'peak_alloc_kb': '阶段内 Python 堆分配峰值（KB），由另一次开启 tracemalloc 的运行测得；不是 RSS，不含解释器本身和 C 扩展的内存',
+    'bytes_read': '阶段内读取的字节数（/proc/self/io 的 rchar），在未开启 tracemalloc 的运行中测得',
+}
+NOISE_FLOOR = {'wall_seconds': 0.05, 'peak_alloc_kb': 4096, 'bytes_read': 65536}
+WORDS = ['user', 'order', 'record', 'bill', 'item', 'list', 'detail', 'setting', 'chart', 'account',
+         'budget', 'sync', 'share', 'search', 'profile', 'category', 'export', 'import', 'report', 'cache']
+
+
+def _js_source(rng: random.Random, lines: int) -> str:
+    body = []
+    for i in range(lines):
+        word = rng.choice(WORDS)
+        if i % 12 == 0:
+            body.append(f"// {word} 模块处理逻辑")
+        elif i % 5 == 0:
+            body.append(f"function {word}{i}(data) {{ return data.{word} || null; }}")
+        else:
+            body.append(f"  const {word}_{i} = computeValue('{word}', {rng.randint(0, 9999)});")
+    return '\n'.join(body) + '\n'
+
+
+def _text_source(rng: random.Random, lines: int, comment: str) -> str:
+    return ''.join(f"{comment} {rng.choice(WORDS)} {i}\nvalue_{i} = {rng.randint(0, 9999)}\n"
+                   for i in range(lines // 2))
+
+
+def _layout_path(layout: str, index: int) -> str:
+    word = WORDS[index % len(WORDS)]
+    bucket = index // 50
+    
+    if layout == 'miniprogram':
+        kind = index % 10
+        if kind < 6:
+            ext = ('.js', '.wxml', '.wxss', '.json')[index % 4]
+            return f"pages/{word}{bucket}/index{index}{ext}"
+        if kind < 8:
+            return f"components/{word}{bucket}/comp{index}.js"
+        return f"utils/{word}/helper{index}.js"
+    
+    if layout == 'node':
+        kind = index % 10
+        if kind < 6:
+            return f"src/{word}/{bucket}/module{index}.js"
+        if kind < 8:
+            return f"lib/{word}/util{index}.ts"
+        if kind < 9:
+            return f"test/{word}/case{index}.js"
+        return f"node_modules/{word}-pkg/index{index}.js"
+    
+    ext, folder = [('.py', 'service'), ('.go', 'pkg'), ('.java', 'src/main/java'), ('.ts', 'web/src'),
+                   ('.rs', 'core/src'), ('.js', 'scripts')][index % 6]
+    return f"{folder}/{word}{bucket}/file{index}{ext}"
+
+
+def generate_project(root: str, layout: str, files: int, seed: int = 0, nesting_depth: int = 32,
+                     huge_file_lines: int = 20000) -> Dict:
+    spec = {'layout': layout, 'files': files, 'seed': seed, 'nesting_depth': nesting_depth,
+            'huge_file_lines': huge_file_lines}
+    root_path = Path(root)
+    spec_path = root_path.parent / f"{root_path.name}{SPEC_SUFFIX}"
+    if spec_path.exists() and root_path.is_dir():
+        with open(spec_path, 'r', encoding='utf-8') as f:
+            if json.load(f) == spec:
+                return spec
+    shutil.rmtree(root_path, ignore_errors=True)
+    
+    rng = random.Random(f"{layout}-{files}-{seed}")
+    root_path.mkdir(parents=True, exist_ok=True)
+    
+    with open(root_path / 'package.json', 'w', encoding='utf-8') as f:
+        json.dump({'name': f'bench-{layout}', 'version': '1.0.0', 'description': '性能测试项目'}, f)
+    with open(root_path / 'README.md', 'w', encoding='utf-8') as f:
+        f.write("# 性能测试项目\n\n## 功能特性\n\n- 记录收支\n- 统计报表\n")
+    if layout == 'miniprogram':
+        with open(root_path / 'app.json', 'w', encoding='utf-8') as f:
+            json.dump({'window': {'navigationBarTitleText': '性能测试小程序'}}, f, ensure_ascii=False)
+        with open(root_path / 'app.js', 'w', encoding='utf-8') as f:
+            f.write(_js_source(rng, 200))
+    
+    created_dirs = set()
+    for index in range(files):
+        rel_path = _layout_path(layout, index)
+        parent = os.path.dirname(rel_path)
+        if parent not in created_dirs:
+            (root_path / parent).mkdir(parents=True, exist_ok=True)
+            created_dirs.add(parent)
+        
+        lines = rng.randint(5, 300)
+        if rel_path.endswith(('.js', '.ts', '.wxml', '.wxss')):
+            content = _js_source(rng, lines)
+        elif rel_path.endswith('.json'):
+            content = json.dumps({'component': True, 'index': index}) + '\n'
+        else:
+            content = _text_source(rng, lines, '#' if rel_path.endswith('.py') else '//')
+        with open(root_path / rel_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+    
+    deep_dir = root_path.joinpath('deep', *[f'level{i}' for i in range(nesting_depth)])
+    deep_dir.mkdir(parents=True, exist_ok=True)
+    with open(deep_dir / 'leaf.js', 'w', encoding='utf-8') as f:
+        f.write(_js_source(rng, 40))
+    
+    if huge_file_lines:
+        with open(root_path / 'huge_module.js', 'w', encoding='utf-8') as f:
+            for start in range(0, huge_file_lines, 1000):
+                f.write(_js_source(rng, min(1000, huge_file_lines - start)))
+    
+    with open(spec_path, 'w', encoding='utf-8') as f:
+        json.dump(spec, f)
+    
+    return spec
+
+
+def _bytes_read() -> Optional[int]:
+    try:
+        with open('/proc/self/io', 'r') as f:
+            for line in f:
+                if line.startswith('rchar:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _measure(stages: Dict, name: str, func, trace: bool = False):
+    if trace:
+        tracemalloc.reset_peak()
+        allocated_before = tracemalloc.get_traced_memory()[0]
+        func()
+        stages[name] = {'peak_alloc_kb': max(tracemalloc.get_traced_memory()[1] - allocated_before, 0) // 1024}
+        return
+    
+    read_before = _bytes_read()
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    read_after = _bytes_read()
+    stages[name] = {
+        'wall_seconds': round(elapsed, 4),
+        'bytes_read': read_after - read_before if read_before is not None else None,
+    }
+
+
+def run_scenario(project_dir: str, output_dir: str, options: Optional[Dict] = None, trace: bool = False) -> Dict:
+    sys.path.insert(0, SCRIPTS_DIR)
+    from generate_copyright_docs import CopyrightDocGenerator, SCAN_INDEX_NAME
+    
+    shutil.rmtree(output_dir, ignore_errors=True)
+    index_path = os.path.join(output_dir, SCAN_INDEX_NAME)
+    stages = {}
+    measure = functools.partial(_measure, stages, trace=trace)
+    if trace:
+        tracemalloc.start()
+    
+    generator = CopyrightDocGenerator(project_dir, index_path=index_path, **(options or {}))
+    measure('analyze_project', generator.analyze_project)
+    
+    generator = CopyrightDocGenerator(project_dir, index_path=index_path, **(options or {}))
+    measure('analyze_project_warm', generator.analyze_project)
+    measure('count_code_lines', generator.count_code_lines)
+    measure('analyze_structure', generator._analyze_structure)
+    measure('generate_source_code_doc',
+            lambda: generator.generate_source_code_doc(os.path.join(output_dir, '源代码文档.md')))
+    
+    if trace:
+        tracemalloc.stop()
+    return {
+        'code_files': len(generator.code_files),
+        'code_lines': generator.count_code_lines(),
+        'stages': stages,
+    }
+
+
+def _run_isolated(project_dir: str, output_dir: str, options: Dict, trace: bool = False) -> Dict:
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(1) as pool:
+        return pool.apply(run_scenario, (project_dir, output_dir, options, trace))
+
+
+def run_benchmarks(workdir: str, sizes: List[int], layouts: List[str], seed: int = 0,
+                   options: Optional[Dict] = None) -> Dict:
+    results = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'options': options or {},
+        'metrics': METRIC_DESCRIPTIONS,
+        'scenarios': {},
+    }
+    
+    for layout in layouts:
+        for size in sizes:
+            key = f"{layout}-{size}"
+            project_dir = os.path.join(workdir, 'projects', key)
+            print(f"[{key}] 生成测试项目...")
+            generate_project(project_dir, layout, size, seed)
+            print(f"[{key}] 运行测试...")
+            output_dir = os.path.join(workdir, 'output', key)
+            scenario = _run_isolated(project_dir, output_dir, options or {})
+            traced = _run_isolated(project_dir, output_dir, options or {}, trace=True)
+            for stage, metrics in traced['stages'].items():
+                scenario['stages'][stage].update(metrics)
+            results['scenarios'][key] = scenario
+            for stage, metrics in scenario['stages'].items():
+                print(f"    {stage:<26} {metrics['wall_seconds']:>9.3f}s  "
+                      f"Python 分配峰值 {metrics['peak_alloc_kb'] or 0:>8} KB  读取 {metrics['bytes_read'] or 0:>12} B")
+    
+    return results
+
+
+def compare_results(baseline: Dict, current: Dict, threshold: float) -> List[str]:
+    regressions = []
+    
+    for key, scenario in current['scenarios'].items():
+        base_scenario = baseline['scenarios'].get(key)
+        if not base_scenario:
+            continue
+        for stage, metrics in scenario['stages'].items():
+            base_metrics = base_scenario['stages'].get(stage)
+            if not base_metrics:
+                continue
+            for metric, value in metrics.items():
+                base_value = base_metrics.get(metric)
+                if value is None or base_value is None:
+                    continue
+                if value - base_value > NOISE_FLOOR[metric] and value > base_value * (1 + threshold):
+                    regressions.append(f"{key} / {stage} / {metric}：{base_value} -> {value}")
+    
+    return regressions
+
+
+def main():
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='软件著作权材料生成器性能测试')
+    parser.add_argument('--sizes', default='100,1000,10000', help='测试项目的文件数，逗号分隔（最大 1000000）')
+    parser.add_argument('--layouts', default=','.join(LAYOUTS), help=f"项目布局，逗号分隔：{', '.join(LAYOUTS)}")
+    parser.add_argument('--workdir', default=os.path.join(os.getcwd(), '.bench'), help='测试项目和输出的工作目录')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子（相同种子生成相同的测试项目）')
+    parser.add_argument('--jobs', type=int, default=1, help='传给生成器的并行扫描数')
+    parser.add_argument('--output', metavar='FILE', help='测试结果 JSON 文件')
+    parser.add_argument('--compare', metavar='BASELINE', help='与基线结果 JSON 比较')
+    parser.add_argument('--threshold', type=float, default=0.2, help='判定为性能回退的增幅比例（默认 0.2）')
+    args = parser.parse_args()
+    
+    layouts = [layout for layout in args.layouts.split(',') if layout]
+    for layout in layouts:
+        if layout not in LAYOUTS:
+            parser.error(f"未知布局：{layout}")
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    
+    results = run_benchmarks(args.workdir, sizes, layouts, args.seed, {'jobs': args.jobs})
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n测试结果已保存到：{args.output}")
+    
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline, results, args.threshold)
+        if regressions:
+            print(f"\n发现 {len(regressions)} 项性能回退（阈值 {args.threshold:.0%}）：")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print("\n未发现性能回退")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+import os
+import re
+import hashlib
+import marshal
+import importlib.util
+from functools import lru_cache
+from typing import Dict, List, Tuple, Union
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_DIR = os.path.join(os.path.dirname(SCRIPTS_DIR), 'references')
+TEMPLATE_NAMES = ('user-manual-template', 'design-doc-template', 'application-form-template')
+ENGINE_VERSION = 1
+MISSING_TEXT = '（请填写）'
+PLACEHOLDER_PATTERN = re.compile(r'\{([^{}\n]+)\}')
+
+
+def template_cache_dir() -> str:
+    cache_root = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.environ.get('COPYRIGHT_TEMPLATE_CACHE') or os.path.join(cache_root, 'copyright-docs', 'templates')
+
+
+def parse_template(text: str) -> List[Union[str, Tuple[str, int]]]:
+    segments = []
+    occurrences = {}
+    position = 0
+    
+    for match in PLACEHOLDER_PATTERN.finditer(text):
+        if match.start() > position:
+            segments.append(text[position:match.start()])
+        name = match.group(1).strip()
+        segments.append((name, occurrences.get(name, 0)))
+        occurrences[name] = occurrences.get(name, 0) + 1
+        position = match.end()
+    if position < len(text):
+        segments.append(text[position:])
+    
+    return segments
+
+
+def compile_template(text: str, name: str = 'template'):
+    parts = []
+    for segment in parse_template(text):
+        if isinstance(segment, str):
+            parts.append(repr(segment))
+        else:
+            parts.append(f"pick(values, {segment[0]!r}, {segment[1]})")
+    
+    body = ''.join(f"        {part},\n" for part in parts)
+    source = f"def render(values, pick):\n    return ''.join((\n{body}    ))\n"
+    return compile(source, f'<{name}>', 'exec')
+
+
+def pick(values: Dict, name: str, occurrence: int) -> str:
+    value = values.get(name)
+    if isinstance(value, (list, tuple)):
+        value = value[occurrence] if occurrence < len(value) else None
+    if value is None or value == '':
+        return MISSING_TEXT
+    return str(value)
+
+
+class Template:
+    __slots__ = ('name', 'digest', '_render')
+    
+    def __init__(self, name: str, digest: str, code):
+        namespace = {}
+        exec(code, namespace)
+        self.name = name
+        self.digest = digest
+        self._render = namespace['render']
+    
+    def render(self, values: Dict) -> str:
+        return self._render(values, pick)
+
+
+def _load_compiled(name: str, text: str, digest: str):
+    cache_key = hashlib.sha1(f"{digest}-{ENGINE_VERSION}-{importlib.util.MAGIC_NUMBER.hex()}".encode()).hexdigest()
+    cache_path = os.path.join(template_cache_dir(), f"{name}-{cache_key}.bin")
+    
+    try:
+        with open(cache_path, 'rb') as f:
+            return marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+    
+    code = compile_template(text, name)
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        temp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            marshal.dump(code, f)
+        os.replace(temp_path, cache_path)
+    except OSError:
+        pass
+    
+    return code
+
+
+@lru_cache(maxsize=None)
+def load_template(name: str, template_dir: str = TEMPLATE_DIR) -> Template:
+    with open(os.path.join(template_dir, f'{name}.md'), 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha1(data).hexdigest()
+    
+    return Template(name, digest, _load_compiled(name, data.decode('utf-8'), digest))
+
+
+def preload_templates(template_dir: str = TEMPLATE_DIR):
+    for name in TEMPLATE_NAMES:
+        load_template(name, template_dir)
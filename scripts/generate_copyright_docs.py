@@ -1,18 +1,730 @@
 #!/usr/bin/env python3
 import os
 import json
+import posixpath
 import re
+import codecs
+import csv
+import functools
+import hashlib
+import heapq
+import itertools
+import subprocess
+import sys
+import threading
+import time
+import unicodedata
+from array import array
+from collections import deque, namedtuple
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from archive_source import ArchiveSource, is_archive
+from git_source import GitRevisionSource, resolve_revision
+
+SCAN_CHUNK_SIZE = 64 * 1024
+SCAN_INDEX_VERSION = 5
+SNIFF_SIZE = 8 * 1024
+DEFAULT_MAX_FILE_SIZE = 1024 * 1024
+MINIFIED_LINE_LENGTH = 300
+GENERATED_FILE_NAMES = {'package-lock.json', 'npm-shrinkwrap.json', 'composer.lock', 'yarn.lock', 'pnpm-lock.yaml'}
+GENERATED_FILE_SUFFIXES = ('.min.js', '.bundle.js')
+GENERATED_HEADER = re.compile(rb'@generated\b|\bCode generated .* DO NOT EDIT\.')
+COMMENT_PREFIXES = (b'//', b'/*', b'*', b'#', b'<!--', b'--')
+SKIP_REASONS = {
+    'binary': '二进制文件',
+    'minified': '压缩代码',
+    'generated': '自动生成文件',
+    'oversized': '超过文件大小上限',
+}
+SCAN_INDEX_NAME = '.scan_index.json'
+DEDUP_MODES = ('exact', 'normalized')
+HORIZONTAL_SPACE = re.compile(rb'[ \t\f\v]+')
+BLANK_LINES = re.compile(rb'[ \n]*\n[ \n]*')
+BUILD_MANIFEST_NAME = '.build_manifest.json'
+BUILD_MANIFEST_VERSION = 1
+TOOL_FILE_NAMES = {SCAN_INDEX_NAME, f'{SCAN_INDEX_NAME}.tmp', BUILD_MANIFEST_NAME, f'{BUILD_MANIFEST_NAME}.tmp'}
+TEMPLATE_VERSION = 2
+DOCUMENT_WORKERS = 4
+WATCH_INTERVAL = 0.5
+METADATA_FILES = ('app.json', 'project.config.json', 'package.json', 'README.md')
+DOCUMENT_TEMPLATES = {
+    'user_manual': 'user-manual-template',
+    'design_doc': 'design-doc-template',
+    'application_form': 'application-form-template',
+}
+CODE_EXTENSIONS = ('.js', '.ts', '.wxml', '.wxss', '.json', '.py', '.java', '.go', '.rs')
+EXCLUDE_DIRS = {'.git', 'node_modules', '__pycache__', 'dist', 'build', '.trae',
+                'miniprogram_npm', 'coverage', '.venv', 'venv'}
+ENCODINGS = (None, 'utf-8', 'utf-8-sig')
+DIGEST_SIZE = 20
+LINE_WIDTH = 90
+TAB_WIDTH = 4
+
+IndexEntry = namedtuple('IndexEntry', ['mtime', 'size', 'inode', 'lines', 'hash', 'priority', 'encoding', 'skip',
+                                       'norm_hash'])
+
+
+class FileTable:
+    __slots__ = ('dirs', '_dir_lookup', 'dir_ids', 'names', 'sizes', 'lines', 'priorities', 'encodings',
+                 'hashes', 'norm_hashes', 'duplicate_of')
+    
+    def __init__(self, dirs: Optional[List[str]] = None, dir_lookup: Optional[Dict[str, int]] = None):
+        self.dirs = dirs if dirs is not None else []
+        self._dir_lookup = dir_lookup if dir_lookup is not None else {}
+        self.dir_ids = array('l')
+        self.names = []
+        self.sizes = array('q')
+        self.lines = array('q')
+        self.priorities = array('h')
+        self.encodings = array('b')
+        self.hashes = bytearray()
+        self.norm_hashes = bytearray()
+        self.duplicate_of = array('l')
+    
+    def add(self, rel_path: str, size: int, lines: int, priority: int, encoding: Optional[str], digest: str,
+            norm_digest: str = ''):
+        directory, _, name = rel_path.rpartition('/')
+        dir_id = self._dir_lookup.get(directory)
+        if dir_id is None:
+            dir_id = len(self.dirs)
+            self.dirs.append(directory)
+            self._dir_lookup[directory] = dir_id
+        
+        self.dir_ids.append(dir_id)
+        self.names.append(name)
+        self.sizes.append(size)
+        self.lines.append(lines)
+        self.priorities.append(priority)
+        self.encodings.append(ENCODINGS.index(encoding))
+        self.hashes += bytes.fromhex(digest) if digest else bytes(DIGEST_SIZE)
+        self.norm_hashes += bytes.fromhex(norm_digest) if norm_digest else bytes(DIGEST_SIZE)
+        self.duplicate_of.append(-1)
+    
+    def update(self, row: int, entry: IndexEntry):
+        self.sizes[row] = entry.size
+        self.lines[row] = entry.lines
+        self.encodings[row] = ENCODINGS.index(entry.encoding)
+        self.hashes[row * DIGEST_SIZE:(row + 1) * DIGEST_SIZE] = bytes.fromhex(entry.hash) or bytes(DIGEST_SIZE)
+        norm_digest = bytes.fromhex(entry.norm_hash) if entry.norm_hash else bytes(DIGEST_SIZE)
+        self.norm_hashes[row * DIGEST_SIZE:(row + 1) * DIGEST_SIZE] = norm_digest
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    def __getitem__(self, row: int) -> str:
+        return self.path(row)
+    
+    def __iter__(self) -> Iterator[str]:
+        return map(self.path, range(len(self.names)))
+    
+    def path(self, row: int) -> str:
+        directory = self.dirs[self.dir_ids[row]]
+        return f'{directory}/{self.names[row]}' if directory else self.names[row]
+    
+    def encoding(self, row: int) -> Optional[str]:
+        return ENCODINGS[self.encodings[row]]
+    
+    def digest(self, row: int) -> str:
+        return self.hashes[row * DIGEST_SIZE:(row + 1) * DIGEST_SIZE].hex()
+    
+    def is_duplicate(self, row: int) -> bool:
+        return self.duplicate_of[row] >= 0
+    
+    def total_lines(self, count_duplicates: bool = True) -> int:
+        return sum(lines for lines, encoding, original in zip(self.lines, self.encodings, self.duplicate_of)
+                   if encoding and (count_duplicates or original < 0))
+    
+    def mark_duplicates(self, normalized: bool = False):
+        hashes = self.norm_hashes if normalized else self.hashes
+        first_rows = {}
+        
+        for row in range(len(self.names)):
+            self.duplicate_of[row] = -1
+            if not self.encodings[row] or not self.lines[row]:
+                continue
+            key = bytes(hashes[row * DIGEST_SIZE:(row + 1) * DIGEST_SIZE])
+            if key == bytes(DIGEST_SIZE):
+                continue
+            self.duplicate_of[row] = first_rows.setdefault(key, row)
+            if self.duplicate_of[row] == row:
+                self.duplicate_of[row] = -1
+    
+    def duplicates(self) -> List[Tuple[int, int]]:
+        return [(row, original) for row, original in enumerate(self.duplicate_of) if original >= 0]
+    
+    def sorted_by_priority(self) -> 'FileTable':
+        order = sorted(range(len(self.names)), key=self.priorities.__getitem__)
+        table = FileTable(self.dirs, self._dir_lookup)
+        table.dir_ids = array('l', (self.dir_ids[row] for row in order))
+        table.names = [self.names[row] for row in order]
+        table.sizes = array('q', (self.sizes[row] for row in order))
+        table.lines = array('q', (self.lines[row] for row in order))
+        table.priorities = array('h', (self.priorities[row] for row in order))
+        table.encodings = array('b', (self.encodings[row] for row in order))
+        table.hashes = bytearray().join(self.hashes[row * DIGEST_SIZE:(row + 1) * DIGEST_SIZE] for row in order)
+        table.norm_hashes = bytearray().join(self.norm_hashes[row * DIGEST_SIZE:(row + 1) * DIGEST_SIZE]
+                                             for row in order)
+        table.duplicate_of = array('l', [-1]) * len(order)
+        return table
+
+
+def glob_to_regex(pattern: str) -> str:
+    parts = []
+    i = 0
+    
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith('**/', i):
+            parts.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('**', i):
+            parts.append('.*')
+            i += 2
+            continue
+        if char == '*':
+            parts.append('[^/]*')
+        elif char == '?':
+            parts.append('[^/]')
+        elif char == '[':
+            end = pattern.find(']', i + 2 if pattern[i + 1:i + 2] in ('!', ']') else i + 1)
+            if end == -1:
+                parts.append(re.escape(char))
+            else:
+                chars = pattern[i + 1:end].replace('\\', '\\\\')
+                if chars.startswith('!'):
+                    chars = '^' + chars[1:]
+                parts.append(f'[{chars}]')
+                i = end + 1
+                continue
+        elif char == '\\' and i + 1 < len(pattern):
+            parts.append(re.escape(pattern[i + 1]))
+            i += 2
+            continue
+        else:
+            parts.append(re.escape(char))
+        i += 1
+    
+    return ''.join(parts)
+
+
+class IgnoreRules:
+    def __init__(self, lines: Iterable[str]):
+        self.rules = []
+        for line in lines:
+            rule = self._compile(line)
+            if rule:
+                self.rules.append(rule)
+        
+        self._file_regex = None
+        self._dir_regex = None
+        self.has_negation = any(negate for _, negate, _ in self.rules)
+        if not self.has_negation:
+            file_patterns = [regex.pattern for regex, _, dir_only in self.rules if not dir_only]
+            dir_patterns = [regex.pattern for regex, _, _ in self.rules]
+            if file_patterns:
+                self._file_regex = re.compile('|'.join(f'(?:{p})' for p in file_patterns))
+            if dir_patterns:
+                self._dir_regex = re.compile('|'.join(f'(?:{p})' for p in dir_patterns))
+    
+    @classmethod
+    def from_file(cls, path) -> Optional['IgnoreRules']:
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                rules = cls(f)
+        except OSError:
+            return None
+        
+        return rules if rules.rules else None
+    
+    @staticmethod
+    def _compile(line: str) -> Optional[Tuple]:
+        line = line.rstrip('\r\n')
+        if not line.strip() or line.startswith('#'):
+            return None
+        
+        if not line.endswith('\\ '):
+            line = line.rstrip()
+        negate = line.startswith('!')
+        if negate:
+            line = line[1:]
+        elif line.startswith('\\'):
+            line = line[1:]
+        
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        if not line:
+            return None
+        
+        anchored = '/' in line
+        body = glob_to_regex(line.lstrip('/'))
+        regex = re.compile(('^' if anchored else '^(?:.*/)?') + body + '$')
+        
+        return regex, negate, dir_only
+    
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        if not self.has_negation:
+            regex = self._dir_regex if is_dir else self._file_regex
+            return True if regex and regex.match(rel_path) else None
+        
+        for regex, negate, dir_only in reversed(self.rules):
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                return not negate
+        
+        return None
+
+
+def classify_name(name: str) -> Optional[str]:
+    if name in GENERATED_FILE_NAMES:
+        return 'generated'
+    if name.endswith(GENERATED_FILE_SUFFIXES):
+        return 'minified' if '.min.' in name else 'generated'
+    return None
+
+
+def sniff_prefix(prefix: bytes) -> Optional[str]:
+    if b'\0' in prefix:
+        return 'binary'
+    
+    head = prefix[len(codecs.BOM_UTF8):1024] if prefix.startswith(codecs.BOM_UTF8) else prefix[:1024]
+    for line in head.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if not line.startswith(COMMENT_PREFIXES):
+            break
+        if GENERATED_HEADER.search(line):
+            return 'generated'
+    
+    if len(prefix) >= 1024:
+        lines = prefix.count(b'\n')
+        complete = prefix[:prefix.rfind(b'\n') + 1] if lines else prefix
+        if len(complete) / max(lines, 1) > MINIFIED_LINE_LENGTH:
+            return 'minified'
+    
+    return None
+
+
+def normalize_block(block: bytes) -> bytes:
+    block = HORIZONTAL_SPACE.sub(b' ', block.replace(b'\r', b'\n'))
+    return BLANK_LINES.sub(b'\n', block).lstrip(b' \n')
+
+
+def scan_file(full_path: str, normalize: bool = False) -> Dict:
+    with open(full_path, 'rb') as f:
+        return scan_stream(f, normalize)
+
+
+def scan_stream(f: BinaryIO, normalize: bool = False) -> Dict:
+    size = 0
+    lines = 0
+    last_byte = b''
+    encoding = 'utf-8'
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    digest = hashlib.sha1()
+    norm_digest = hashlib.sha1() if normalize else None
+    pending = b''
+    
+    chunk = f.read(SNIFF_SIZE)
+    skip = sniff_prefix(chunk)
+    if skip:
+        return {'size': len(chunk), 'lines': 0, 'encoding': None, 'hash': '', 'skip': skip}
+    
+    while chunk:
+        if size == 0 and chunk.startswith(codecs.BOM_UTF8):
+            encoding = 'utf-8-sig'
+        size += len(chunk)
+        digest.update(chunk)
+        if norm_digest:
+            pending += chunk
+            cut = max(pending.rfind(b'\n'), pending.rfind(b'\r')) + 1
+            if cut:
+                norm_digest.update(normalize_block(pending[:cut]))
+                pending = pending[cut:]
+        lines += chunk.count(b'\n')
+        last_byte = chunk[-1:]
+        if encoding:
+            try:
+                decoder.decode(chunk)
+            except UnicodeDecodeError:
+                encoding = None
+        chunk = f.read(SCAN_CHUNK_SIZE)
+    
+    if encoding:
+        try:
+            decoder.decode(b'', final=True)
+        except UnicodeDecodeError:
+            encoding = None
+    
+    if last_byte and last_byte != b'\n':
+        lines += 1
+    if norm_digest and pending:
+        norm_digest.update(normalize_block(pending + b'\n'))
+    
+    return {'size': size, 'lines': lines, 'encoding': encoding, 'hash': digest.hexdigest(),
+            'norm_hash': norm_digest.hexdigest() if norm_digest else ''}
+
+
+@functools.lru_cache(maxsize=None)
+def width_table() -> bytes:
+    table = bytearray(0x10000)
+    for code in range(0x10000):
+        table[code] = char_width(chr(code))
+    return bytes(table)
+
+
+def char_width(char: str) -> int:
+    if char == '\t':
+        return TAB_WIDTH
+    if unicodedata.combining(char) or unicodedata.category(char) in ('Cc', 'Cf', 'Mn', 'Me'):
+        return 0
+    return 2 if unicodedata.east_asian_width(char) in ('W', 'F') else 1
+
+
+def fit_width(text: str, start: int, room: int) -> Tuple[int, int]:
+    window = text[start:start + room]
+    if window.isascii() and '\t' not in window:
+        return start + len(window), len(window)
+    
+    table = width_table()
+    used = 0
+    end = start
+    while end < len(text):
+        code = ord(text[end])
+        width = table[code] if code < 0x10000 else char_width(text[end])
+        if used + width > room:
+            break
+        used += width
+        end += 1
+    return end, used
+
+
+def layout_stream(f: BinaryIO, encoding: str, width: int = LINE_WIDTH) -> Iterator[Tuple[int, int, str]]:
+    decoder = codecs.getincrementaldecoder(encoding)()
+    line_no = 1
+    part = 0
+    pieces = []
+    used = 0
+    held = []
+    
+    def fill(text: str, position: int) -> int:
+        nonlocal used
+        end, taken = fit_width(text, position, width - used)
+        if end == position:
+            if used:
+                used = width
+                return position
+            end, taken = position + 1, width
+        pieces.append(text[position:end])
+        used += taken
+        return end
+    
+    def wrap() -> Iterator[Tuple[int, int, str]]:
+        nonlocal part, pieces, used
+        yield line_no, part, ''.join(pieces)
+        part += 1
+        pieces = []
+        used = 0
+    
+    def release_held() -> Iterator[Tuple[int, int, str]]:
+        yield from wrap()
+        for char, count in held:
+            while count:
+                if used >= width:
+                    yield from wrap()
+                count -= fill(char * min(count, width), 0)
+        held.clear()
+    
+    for chunk in itertools.chain(iter(functools.partial(f.read, SCAN_CHUNK_SIZE), b''), [None]):
+        text = decoder.decode(b'', final=True) if chunk is None else decoder.decode(chunk)
+        lines = text.split('\n')
+        for index, line in enumerate(lines):
+            position = 0
+            while position < len(line):
+                if used < width:
+                    position = fill(line, position)
+                    continue
+                char = line[position]
+                if char.isspace():
+                    if held and held[-1][0] == char:
+                        held[-1][1] += 1
+                    else:
+                        held.append([char, 1])
+                    position += 1
+                elif not held and char_width(char) == 0:
+                    pieces.append(char)
+                    position += 1
+                else:
+                    yield from release_held()
+            
+            if index < len(lines) - 1:
+                yield line_no, part, ''.join(pieces).rstrip()
+                line_no += 1
+                part = 0
+                pieces = []
+                used = 0
+                held.clear()
+    
+    if pieces:
+        yield line_no, part, ''.join(pieces).rstrip()
+
+
+def probe_file(full_path: str, cached: Optional[IndexEntry] = None, max_size: int = DEFAULT_MAX_FILE_SIZE,
+               normalize: bool = False) -> Tuple[Optional[IndexEntry], bool, int, float]:
+    started = time.perf_counter()
+    try:
+        st = os.stat(full_path)
+    except OSError:
+        return None, False, 0, time.perf_counter() - started
+    
+    if (cached and cached.mtime == st.st_mtime_ns and cached.size == st.st_size and cached.inode == st.st_ino
+            and (cached.skip == 'oversized') == (st.st_size > max_size)
+            and (cached.norm_hash or cached.skip or not normalize)):
+        return cached, False, 0, time.perf_counter() - started
+    
+    skip = classify_name(os.path.basename(full_path))
+    if not skip and st.st_size > max_size:
+        skip = 'oversized'
+    
+    bytes_read = 0
+    if skip:
+        result = {'lines': 0, 'encoding': None, 'hash': '', 'skip': skip}
+    else:
+        try:
+            result = scan_file(full_path, normalize)
+            bytes_read = result['size']
+        except OSError:
+            result = {'lines': 0, 'encoding': None, 'hash': ''}
+    entry = IndexEntry(st.st_mtime_ns, st.st_size, st.st_ino, result['lines'], result['hash'], None,
+                       result['encoding'], result.get('skip'), result.get('norm_hash', ''))
+    
+    return entry, True, bytes_read, time.perf_counter() - started
+
+
+def probe_member(source, name: str, cached: Optional[IndexEntry] = None, max_size: int = DEFAULT_MAX_FILE_SIZE,
+                 normalize: bool = False) -> Tuple[Optional[IndexEntry], bool, int, float]:
+    started = time.perf_counter()
+    size = source.size(name)
+    skip = classify_name(posixpath.basename(name))
+    if not skip and size > max_size:
+        skip = 'oversized'
+    
+    if skip:
+        entry = IndexEntry(0, size, 0, 0, '', None, None, skip, '')
+        return entry, False, 0, time.perf_counter() - started
+    if cached and (cached.norm_hash or cached.skip or not normalize):
+        return cached, False, 0, time.perf_counter() - started
+    
+    with source.open(name) as f:
+        result = scan_stream(f, normalize)
+    entry = IndexEntry(0, size, 0, result['lines'], result['hash'], None, result['encoding'], result.get('skip'),
+                       result.get('norm_hash', ''))
+    
+    return entry, True, result['size'], time.perf_counter() - started
+
+
+def profiled_phase(name: str):
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.profile_phase(name):
+                result = method(self, *args, **kwargs)
+                output_path = kwargs.get('output_path', args[0] if args else None)
+                if output_path and os.path.exists(output_path):
+                    self.add_metric('bytes_written', os.path.getsize(output_path))
+            return result
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def atomic_open(output_path, mode: str = 'w', encoding: Optional[str] = 'utf-8'):
+    temp_path = f"{output_path}.tmp"
+    f = open(temp_path, mode, encoding=encoding if 'b' not in mode else None)
+    try:
+        yield f
+    except BaseException:
+        f.close()
+        os.unlink(temp_path)
+        raise
+    f.close()
+    os.replace(temp_path, output_path)
+
+
+def input_digest(inputs: Dict) -> str:
+    payload = json.dumps(inputs, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class BuildManifest:
+    def __init__(self, output_dir: str):
+        self.path = os.path.join(output_dir, BUILD_MANIFEST_NAME)
+        self.documents = {}
+        self._dirty = False
+        
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == BUILD_MANIFEST_VERSION:
+                self.documents = data.get('documents', {})
+        except (OSError, ValueError):
+            pass
+    
+    def is_current(self, output_path: str, digest: str) -> bool:
+        return self.documents.get(os.path.basename(output_path)) == digest and os.path.exists(output_path)
+    
+    def record(self, output_path: str, digest: str):
+        self.documents[os.path.basename(output_path)] = digest
+        self._dirty = True
+    
+    def discard(self, output_path: str):
+        if self.documents.pop(os.path.basename(output_path), None) is not None:
+            self._dirty = True
+    
+    def save(self):
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with atomic_open(self.path) as f:
+            json.dump({'version': BUILD_MANIFEST_VERSION, 'documents': self.documents}, f, ensure_ascii=False,
+                      indent=1, sort_keys=True)
+        self._dirty = False
+
+
+class JsonLinesProfiler:
+    def __init__(self, output_path: str):
+        output_file = Path(output_path)
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(output_file, 'a', encoding='utf-8')
+    
+    def __call__(self, event: Dict):
+        self.file.write(json.dumps(event, ensure_ascii=False) + '\n')
+        self.file.flush()
+    
+    def close(self):
+        self.file.close()
+
 
 class CopyrightDocGenerator:
-    def __init__(self, project_path: str):
+    def __init__(self, project_path: str, index_path: Optional[str] = None, jobs: int = 1,
+                 executor: str = 'thread', use_gitignore: bool = True,
+                 exclude_file: Optional[str] = None, git_ls_files: bool = False,
+                 max_file_size: int = DEFAULT_MAX_FILE_SIZE, dedup: Optional[str] = None,
+                 count_duplicates: bool = True, rev: Optional[str] = None):
+        if dedup not in (None,) + DEDUP_MODES:
+            raise ValueError(f"未知的去重方式：{dedup}")
         self.project_path = Path(project_path)
+        self.source = None
+        self.index_path = Path(index_path) if index_path else None
+        if rev:
+            self.source = GitRevisionSource(project_path, rev)
+            self.index_path = Path(self.source.cache_path)
+        elif is_archive(project_path):
+            self.source = ArchiveSource(project_path)
+            self.index_path = None
+        self.jobs = max(1, jobs)
+        self.executor = executor
+        self.use_gitignore = use_gitignore
+        self.exclude_rules = IgnoreRules.from_file(exclude_file) if exclude_file else None
+        self.git_ls_files = git_ls_files
+        self.max_file_size = max_file_size
+        self.dedup = dedup
+        self.count_duplicates = count_duplicates
+        self.skipped_files = []
         self.project_info = {}
-        self.code_files = []
+        self.code_files = FileTable()
+        self.walked_dirs = []
+        self._page_cache = {}
+        self._index = None
+        self._index_dirty = False
+        self.hooks = []
+        self.profile_top = 10
+        self.metrics = {'files_visited': 0, 'files_pruned': 0, 'dirs_pruned': 0, 'bytes_read': 0, 'bytes_written': 0}
+        self.file_timings = []
+        self._lock = threading.Lock()
+        self._active_phases = threading.local()
+    
+    def close(self):
+        if self.source is not None:
+            self.source.close()
+    
+    def add_hook(self, callback: Callable[[Dict], None]):
+        self.hooks.append(callback)
+    
+    def emit(self, event: Dict):
+        with self._lock:
+            for hook in self.hooks:
+                hook(event)
+    
+    def add_metric(self, key: str, amount: int):
+        with self._lock:
+            self.metrics[key] += amount
+        for counters in getattr(self._active_phases, 'stack', ()):
+            counters[key] += amount
+    
+    @contextmanager
+    def _counting(self, counters: Dict[str, int]):
+        stack = self._active_phases.__dict__.setdefault('stack', [])
+        stack.append(counters)
+        try:
+            yield counters
+        finally:
+            stack.pop()
+    
+    @contextmanager
+    def profile_phase(self, name: str):
+        counters = dict.fromkeys(self.metrics, 0)
+        started = time.perf_counter()
+        try:
+            with self._counting(counters):
+                yield
+        finally:
+            event = {'event': 'phase', 'phase': name, 'project': str(self.project_path),
+                     'seconds': round(time.perf_counter() - started, 6)}
+            event.update(counters)
+            self.emit(event)
+    
+    def slowest_files(self, count: Optional[int] = None) -> List[Dict]:
+        slowest = heapq.nlargest(count or self.profile_top, self.file_timings)
+        return [{'file': file_path, 'seconds': round(seconds, 6), 'bytes_read': bytes_read}
+                for seconds, file_path, bytes_read in slowest]
+    
+    def _read_metadata_file(self, name: str) -> Optional[str]:
+        if self.source is not None:
+            data = self.source.read(name)
+        else:
+            path = self.project_path / name
+            data = path.read_bytes() if path.exists() else None
+        if data is None:
+            return None
         
+        self.add_metric('bytes_read', len(data))
+        return data.decode('utf-8')
+    
+    def _open_code_file(self, file_path: str) -> BinaryIO:
+        if self.source is not None:
+            return self.source.open(file_path)
+        return open(self.project_path / file_path, 'rb')
+    
     def analyze_project(self) -> Dict:
+        self.probe_metadata()
+        self.collect_code_files()
+        
+        return self.project_info
+    
+    def probe_metadata(self) -> Dict:
+        with self.profile_phase('metadata'):
+            self._probe_metadata()
+        
+        return self.project_info
+    
+    def _probe_metadata(self):
         self.project_info = {
             'name': '',
             'version': '',
@@ -22,47 +734,37 @@ class CopyrightDocGenerator:
             'platform': '',
             'tech_stack': [],
             'features': [],
-            'structure': {}
+            'structure': None
         }
         
-        app_json = self.project_path / 'app.json'
-        if app_json.exists():
-            with open(app_json, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.project_info['name'] = data.get('window', {}).get('navigationBarTitleText', '')
-                self.project_info['type'] = '微信小程序'
-                self.project_info['platform'] = '微信小程序平台'
-                self.project_info['tech_stack'] = ['微信小程序原生框架']
-        
-        project_config = self.project_path / 'project.config.json'
-        if project_config.exists():
-            with open(project_config, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.project_info['appid'] = data.get('appid', '')
-                self.project_info['lib_version'] = data.get('libVersion', '')
+        content = self._read_metadata_file('app.json')
+        if content is not None:
+            data = json.loads(content)
+            self.project_info['name'] = data.get('window', {}).get('navigationBarTitleText', '')
+            self.project_info['type'] = '微信小程序'
+            self.project_info['platform'] = '微信小程序平台'
+            self.project_info['tech_stack'] = ['微信小程序原生框架']
         
-        package_json = self.project_path / 'package.json'
-        if package_json.exists():
-            with open(package_json, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                if not self.project_info['name']:
-                    self.project_info['name'] = data.get('name', '')
-                self.project_info['version'] = data.get('version', '1.0.0')
-                self.project_info['description'] = data.get('description', '')
-                self.project_info['author'] = data.get('author', '')
-                if not self.project_info['tech_stack']:
-                    self.project_info['tech_stack'] = ['Node.js']
-        
-        readme = self.project_path / 'README.md'
-        if readme.exists():
-            with open(readme, 'r', encoding='utf-8') as f:
-                content = f.read()
-                self._extract_features_from_readme(content)
-        
-        self._collect_code_files()
-        self._analyze_structure()
+        content = self._read_metadata_file('project.config.json')
+        if content is not None:
+            data = json.loads(content)
+            self.project_info['appid'] = data.get('appid', '')
+            self.project_info['lib_version'] = data.get('libVersion', '')
         
-        return self.project_info
+        content = self._read_metadata_file('package.json')
+        if content is not None:
+            data = json.loads(content)
+            if not self.project_info['name']:
+                self.project_info['name'] = data.get('name', '')
+            self.project_info['version'] = data.get('version', '1.0.0')
+            self.project_info['description'] = data.get('description', '')
+            self.project_info['author'] = data.get('author', '')
+            if not self.project_info['tech_stack']:
+                self.project_info['tech_stack'] = ['Node.js']
+        
+        content = self._read_metadata_file('README.md')
+        if content is not None:
+            self._extract_features_from_readme(content)
     
     def _extract_features_from_readme(self, content: str):
         features = []
@@ -84,391 +786,1123 @@ class CopyrightDocGenerator:
         
         self.project_info['features'] = features
     
-    def _collect_code_files(self):
-        code_extensions = ['.js', '.ts', '.wxml', '.wxss', '.json', '.py', '.java', '.go', '.rs']
-        exclude_dirs = ['.git', 'node_modules', '__pycache__', 'dist', 'build', '.trae']
+    def collect_code_files(self):
+        with self.profile_phase('walk'):
+            self.walked_dirs = []
+            if self.source is not None:
+                files = self._list_source_files()
+            else:
+                files = self._list_git_files() if self.git_ls_files else None
+            if files is None:
+                files = list(self._walk_code_files())
+            else:
+                self.walked_dirs = sorted({file_path.rpartition('/')[0] for file_path in files} | {''})
+        
+        with self.profile_phase('scan'):
+            self._scan_code_files(files)
+        self.emit({'event': 'slowest_files', 'project': str(self.project_path), 'files': self.slowest_files()})
+    
+    def _output_dir_in_project(self) -> Optional[str]:
+        if not self.index_path:
+            return None
+        
+        output_dir = self.index_path.parent.resolve()
+        try:
+            return output_dir.relative_to(self.project_path.resolve()).as_posix()
+        except ValueError:
+            return None
+    
+    def _is_ignored(self, rule_chain: List[Tuple[str, IgnoreRules]], rel_path: str, is_dir: bool) -> bool:
+        if self.exclude_rules:
+            result = self.exclude_rules.match(rel_path, is_dir)
+            if result is not None:
+                return result
+        
+        for base, rules in reversed(rule_chain):
+            result = rules.match(rel_path[len(base) + 1:] if base else rel_path, is_dir)
+            if result is not None:
+                return result
+        
+        return False
+    
+    def _walk_code_files(self) -> Iterator[str]:
+        output_dir = self._output_dir_in_project()
+        root_chain = []
+        if self.use_gitignore:
+            info_exclude = IgnoreRules.from_file(self.project_path / '.git' / 'info' / 'exclude')
+            if info_exclude:
+                root_chain.append(('', info_exclude))
         
-        for root, dirs, files in os.walk(self.project_path):
-            dirs[:] = [d for d in dirs if d not in exclude_dirs]
+        stack = [('', root_chain)]
+        while stack:
+            rel_dir, rule_chain = stack.pop()
+            dir_path = self.project_path / rel_dir if rel_dir else self.project_path
+            
+            if self.use_gitignore:
+                rules = IgnoreRules.from_file(dir_path / '.gitignore')
+                if rules:
+                    rule_chain = rule_chain + [(rel_dir, rules)]
+            
+            try:
+                with os.scandir(dir_path) as it:
+                    entries = list(it)
+            except OSError:
+                continue
             
-            for file in files:
-                if any(file.endswith(ext) for ext in code_extensions):
-                    file_path = Path(root) / file
-                    relative_path = file_path.relative_to(self.project_path)
-                    self.code_files.append(str(relative_path))
+            self.walked_dirs.append(rel_dir)
+            subdirs = []
+            self.add_metric('files_visited', len(entries))
+            for entry in entries:
+                rel_path = f'{rel_dir}/{entry.name}' if rel_dir else entry.name
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    continue
+                
+                if is_dir:
+                    if (entry.name in EXCLUDE_DIRS or rel_path == output_dir or entry.is_symlink()
+                            or self._is_ignored(rule_chain, rel_path, True)):
+                        self.add_metric('dirs_pruned', 1)
+                        continue
+                    subdirs.append((rel_path, rule_chain))
+                elif entry.name.endswith(CODE_EXTENSIONS) and entry.name not in TOOL_FILE_NAMES:
+                    if self._is_ignored(rule_chain, rel_path, False):
+                        self.add_metric('files_pruned', 1)
+                        continue
+                    yield rel_path
+            
+            stack.extend(reversed(subdirs))
+    
+    def _list_source_files(self) -> List[str]:
+        names = self.source.list_files()
+        gitignores = {}
+        if self.use_gitignore:
+            for name in names:
+                if posixpath.basename(name) == '.gitignore' or name == '.git/info/exclude':
+                    content = self.source.read(name).decode('utf-8', errors='replace')
+                    base = '' if name == '.git/info/exclude' else posixpath.dirname(name)
+                    gitignores.setdefault(base, []).append(IgnoreRules(content.splitlines()))
+        
+        chains = {}
+        
+        def dir_chain(rel_dir: str) -> Optional[List[Tuple[str, IgnoreRules]]]:
+            if rel_dir in chains:
+                return chains[rel_dir]
+            chain = []
+            if rel_dir:
+                parent, _, name = rel_dir.rpartition('/')
+                chain = dir_chain(parent)
+                if chain is not None and (name in EXCLUDE_DIRS or self._is_ignored(chain, rel_dir, True)):
+                    self.add_metric('dirs_pruned', 1)
+                    chain = None
+            if chain is not None and rel_dir in gitignores:
+                chain = chain + [(rel_dir, rules) for rules in gitignores[rel_dir]]
+            chains[rel_dir] = chain
+            return chain
         
-        self.code_files.sort(key=self._file_priority)
+        files = []
+        for name in names:
+            self.add_metric('files_visited', 1)
+            if not name.endswith(CODE_EXTENSIONS) or posixpath.basename(name) in TOOL_FILE_NAMES:
+                continue
+            chain = dir_chain(posixpath.dirname(name))
+            if chain is None:
+                continue
+            if self._is_ignored(chain, name, False):
+                self.add_metric('files_pruned', 1)
+                continue
+            files.append(name)
+        
+        self.walked_dirs = [rel_dir for rel_dir, chain in chains.items() if chain is not None]
+        return files
+    
+    def _list_git_files(self) -> Optional[List[str]]:
+        try:
+            result = subprocess.run(['git', '-C', str(self.project_path), 'ls-files', '-z'],
+                                    capture_output=True, check=True)
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        
+        output_dir = self._output_dir_in_project()
+        files = []
+        for raw_path in result.stdout.split(b'\0'):
+            if not raw_path:
+                continue
+            self.add_metric('files_visited', 1)
+            rel_path = os.fsdecode(raw_path)
+            parts = rel_path.split('/')
+            if (not parts[-1].endswith(CODE_EXTENSIONS) or parts[-1] in TOOL_FILE_NAMES
+                    or any(part in EXCLUDE_DIRS for part in parts[:-1])):
+                continue
+            if output_dir and rel_path.startswith(output_dir + '/'):
+                continue
+            if self.exclude_rules and any(
+                    self.exclude_rules.match('/'.join(parts[:i]), i < len(parts))
+                    for i in range(1, len(parts) + 1)):
+                self.add_metric('files_pruned', 1)
+                continue
+            files.append(rel_path)
+        
+        return files
+    
+    def _scan_code_files(self, candidates: List[str]):
+        index = self._load_index()
+        if self.source is not None:
+            keys = [self.source.cache_key(file_path) for file_path in candidates]
+        else:
+            keys = candidates
+        full_paths = [str(self.project_path / file_path) for file_path in candidates]
+        cached = [index.get(key) if key else None for key in keys]
+        max_sizes = itertools.repeat(self.max_file_size)
+        normalize = itertools.repeat(self.dedup == 'normalized')
+        
+        if self.source is not None:
+            results = [probe_member(self.source, file_path, entry, self.max_file_size, self.dedup == 'normalized')
+                       for file_path, entry in zip(candidates, cached)]
+        elif self.jobs > 1 and len(full_paths) > 1:
+            pool_class = ProcessPoolExecutor if self.executor == 'process' else ThreadPoolExecutor
+            chunksize = max(1, len(full_paths) // (self.jobs * 4)) if self.executor == 'process' else 1
+            with pool_class(max_workers=self.jobs) as pool:
+                results = list(pool.map(probe_file, full_paths, cached, max_sizes, normalize, chunksize=chunksize))
+        else:
+            results = list(map(probe_file, full_paths, cached, max_sizes, normalize))
+        
+        table = FileTable()
+        self.skipped_files = []
+        self.file_timings = []
+        for file_path, key, (entry, changed, bytes_read, seconds) in zip(candidates, keys, results):
+            self.add_metric('bytes_read', bytes_read)
+            timing = (seconds, file_path, bytes_read)
+            if len(self.file_timings) < self.profile_top:
+                heapq.heappush(self.file_timings, timing)
+            else:
+                heapq.heappushpop(self.file_timings, timing)
+            if entry is None:
+                continue
+            if changed or self.source is not None:
+                entry = entry._replace(priority=self._file_priority(file_path))
+            if changed and key:
+                index[key] = entry
+                self._index_dirty = True
+            if entry.skip:
+                self.skipped_files.append((file_path, entry.skip, entry.size))
+                continue
+            table.add(file_path, entry.size, entry.lines, entry.priority, entry.encoding, entry.hash,
+                      entry.norm_hash)
+        
+        self.code_files = table.sorted_by_priority()
+        if self.dedup:
+            self.code_files.mark_duplicates(self.dedup == 'normalized')
+        self.project_info['structure'] = None
+        if self.source is None:
+            scanned = set(candidates)
+            for file_path in list(index):
+                if file_path not in scanned:
+                    del index[file_path]
+                    self._index_dirty = True
+        
+        self._save_index()
+    
+    def refresh_files(self, changed: Iterable[str]):
+        table = self.code_files
+        rows = {file_path: row for row, file_path in enumerate(table)}
+        changed = set(changed)
+        if any(path not in rows and path not in METADATA_FILES for path in changed):
+            self.collect_code_files()
+            return
+        
+        index = self._load_index()
+        updates = []
+        with self.profile_phase('scan'):
+            for file_path in changed & rows.keys():
+                entry, _, bytes_read, _ = probe_file(str(self.project_path / file_path), index.get(file_path),
+                                                     self.max_file_size, self.dedup == 'normalized')
+                self.add_metric('bytes_read', bytes_read)
+                if entry is None or entry.skip:
+                    break
+                updates.append((file_path, entry._replace(priority=table.priorities[rows[file_path]])))
+            else:
+                for file_path, entry in updates:
+                    index[file_path] = entry
+                    table.update(rows[file_path], entry)
+                if self.dedup:
+                    table.mark_duplicates(self.dedup == 'normalized')
+                self._index_dirty = True
+                self._save_index()
+                return
+        
+        self.collect_code_files()
+    
+    def watch_snapshot(self) -> Dict[str, Tuple[int, int]]:
+        watched = [rel_dir or '.' for rel_dir in self.walked_dirs]
+        if self.use_gitignore:
+            watched.extend(f'{rel_dir}/.gitignore' if rel_dir else '.gitignore' for rel_dir in self.walked_dirs)
+            watched.append('.git/info/exclude')
+        watched.extend(METADATA_FILES)
+        watched.extend(self.code_files)
+        watched.extend(file_path for file_path, _, _ in self.skipped_files)
+        
+        root = str(self.project_path)
+        snapshot = {}
+        for rel_path in watched:
+            try:
+                st = os.stat(os.path.join(root, rel_path))
+            except OSError:
+                continue
+            snapshot[rel_path] = (st.st_mtime_ns, st.st_size)
+        
+        return snapshot
+    
+    def _load_index(self) -> Dict:
+        if self._index is not None:
+            return self._index
+        
+        self._index = {}
+        if self.index_path and self.index_path.exists():
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == SCAN_INDEX_VERSION:
+                    self._index = {file_path: IndexEntry(*row) for file_path, row in data.get('files', {}).items()}
+            except (OSError, ValueError):
+                pass
+        
+        return self._index
+    
+    def _save_index(self):
+        if not self.index_path or not self._index_dirty:
+            return
+        
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.index_path.with_name(self.index_path.name + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': SCAN_INDEX_VERSION, 'files': self._index}, f, ensure_ascii=False)
+        os.replace(temp_path, self.index_path)
+        self._index_dirty = False
     
     def _file_priority(self, file_path: str) -> int:
-        path = Path(file_path)
+        name = file_path.rpartition('/')[2]
         
-        if path.name == 'app.js':
+        if name == 'app.js':
             return 0
-        if path.name == 'main.js':
+        if name == 'main.js':
             return 1
-        if path.name == 'index.js':
+        if name == 'index.js':
             return 2
-        if 'utils' in str(path):
+        if 'utils' in file_path:
             return 10
-        if 'pages' in str(path):
+        if 'pages' in file_path:
             return 20
-        if 'components' in str(path):
+        if 'components' in file_path:
             return 30
-        if 'config' in str(path):
+        if 'config' in file_path:
             return 40
         
         return 50
     
+    @property
+    def structure(self) -> Dict:
+        if self.project_info.get('structure') is None:
+            self._analyze_structure()
+        return self.project_info['structure']
+    
     def _analyze_structure(self):
-        structure = {}
+        with self.profile_phase('structure'):
+            self._ensure_file_table()
+            table = self.code_files
+            structure = {}
+            dir_nodes = {'': structure}
+            
+            def dir_node(directory: str) -> Dict:
+                node = dir_nodes.get(directory)
+                if node is None:
+                    parent, _, name = directory.rpartition('/')
+                    node = dir_node(parent).setdefault(name, {})
+                    dir_nodes[directory] = node
+                return node
+            
+            for dir_id, name in zip(table.dir_ids, table.names):
+                dir_node(table.dirs[dir_id])[name] = 'file'
+            
+            self.project_info['structure'] = structure
+    
+    def _ensure_file_table(self):
+        if not isinstance(self.code_files, FileTable):
+            self._scan_code_files(list(self.code_files))
+    
+    def count_code_lines(self) -> int:
+        self._ensure_file_table()
+        return self.code_files.total_lines(self.count_duplicates)
+    
+    def _iter_file_lines(self, row: int) -> Iterator[Tuple[int, int, str]]:
+        encoding = self.code_files.encoding(row) or 'utf-8'
+        
+        try:
+            with self._open_code_file(self.code_files.path(row)) as f:
+                try:
+                    yield from layout_stream(f, encoding)
+                finally:
+                    self.add_metric('bytes_read', f.tell())
+        except (OSError, UnicodeDecodeError):
+            return
+    
+    def _iter_source_lines(self, rows: Iterable[int]) -> Iterator[Tuple[int, int, int, str]]:
+        for row in rows:
+            for line_no, part, text in self._iter_file_lines(row):
+                yield row, line_no, part, text
+    
+    def _paginate(self, source_lines: Iterable[Tuple[int, int, int, str]], lines_per_page: int,
+                  first_page: int, section: str) -> Iterator[Dict]:
+        page = None
+        page_num = first_page
+        previous = None
         
-        for file_path in self.code_files:
-            parts = Path(file_path).parts
-            current = structure
+        for row, line_no, part, text in source_lines:
+            if page is None:
+                page = {'number': page_num, 'section': section, 'segments': [], 'line_count': 0}
+                previous = None
             
-            for i, part in enumerate(parts):
-                if i == len(parts) - 1:
-                    current[part] = 'file'
-                else:
-                    if part not in current:
-                        current[part] = {}
-                    current = current[part]
+            if previous != (row, line_no if part else line_no - 1):
+                page['segments'].append({
+                    'file': self.code_files.path(row),
+                    'total_lines': self.code_files.lines[row],
+                    'start_line': line_no,
+                    'start_part': part,
+                    'lines': [],
+                })
+            page['segments'][-1]['lines'].append(text)
+            page['line_count'] += 1
+            previous = (row, line_no)
+            
+            if page['line_count'] >= lines_per_page:
+                yield page
+                page = None
+                page_num += 1
         
-        self.project_info['structure'] = structure
+        if page is not None:
+            yield page
     
-    def count_code_lines(self) -> int:
-        total_lines = 0
+    def iter_source_pages(self, lines_per_page: int = 50, total_pages: int = 60) -> Iterator[Dict]:
+        self._ensure_file_table()
+        side_lines = lines_per_page * (total_pages // 2)
+        page_cache = {}
+        
+        for section, rows, first_page in self._page_plan(lines_per_page, total_pages):
+            key = (lines_per_page, total_pages, first_page, LINE_WIDTH, self.rows_fingerprint(rows))
+            cached = self._page_cache.get(section)
+            if cached and cached[0] == key:
+                page_cache[section] = cached
+                yield from cached[1]
+                continue
+            
+            pages = []
+            for part, part_first_page, source_lines in self._layout_section(section, rows, first_page, side_lines,
+                                                                             total_pages // 2):
+                for page in self._paginate(source_lines, lines_per_page, part_first_page, part):
+                    pages.append(page)
+                    yield page
+            page_cache[section] = (key, pages)
+        
+        self._page_cache = page_cache
+    
+    def _layout_section(self, section: str, rows: List[int], first_page: int, side_lines: int,
+                        side_pages: int) -> Iterator[Tuple[str, int, Iterable[Tuple[int, int, int, str]]]]:
+        source_lines = self._iter_source_lines(rows)
+        if section == 'tail':
+            yield section, first_page, deque(source_lines, maxlen=side_lines)
+            return
+        
+        yield section, first_page, itertools.islice(source_lines, side_lines)
+        if section == 'all':
+            rest = deque(source_lines, maxlen=side_lines + 1)
+            if len(rest) > side_lines:
+                rest.popleft()
+                section = 'tail'
+            yield section, side_pages + 1, rest
+    
+    def _page_plan(self, lines_per_page: int, total_pages: int) -> List[Tuple[str, List[int], int]]:
+        table = self.code_files
+        rows = [row for row in range(len(table)) if table.encodings[row] and not table.is_duplicate(row)]
+        side_pages = total_pages // 2
+        side_lines = lines_per_page * side_pages
+        total_lines = sum(table.lines[row] for row in rows)
+        
+        if total_lines <= side_lines * 2:
+            return [('all', rows, 1)]
+        
+        end = 0
+        covered = 0
+        while end < len(rows) and covered < side_lines:
+            covered += table.lines[rows[end]]
+            end += 1
+        
+        start = len(rows) - 1
+        remaining = side_lines
+        while start > 0 and table.lines[rows[start]] < remaining:
+            remaining -= table.lines[rows[start]]
+            start -= 1
+        
+        return [('head', rows[:end], 1), ('tail', rows[start:], side_pages + 1)]
+    
+    def _profiled_pages(self, lines_per_page: int, total_pages: int) -> Iterator[Dict]:
+        counters = dict.fromkeys(self.metrics, 0)
+        elapsed = 0.0
+        pages = self.iter_source_pages(lines_per_page, total_pages)
         
-        for file_path in self.code_files:
-            full_path = self.project_path / file_path
+        while True:
+            started = time.perf_counter()
             try:
-                with open(full_path, 'r', encoding='utf-8') as f:
-                    total_lines += len(f.readlines())
-            except:
-                pass
+                with self._counting(counters):
+                    page = next(pages)
+            except StopIteration:
+                break
+            finally:
+                elapsed += time.perf_counter() - started
+            yield page
+        
+        event = {'event': 'phase', 'phase': 'paginate', 'project': str(self.project_path),
+                 'seconds': round(elapsed, 6)}
+        event.update(counters)
+        self.emit(event)
+    
+    def rows_fingerprint(self, rows: Iterable[int]) -> str:
+        table = self.code_files
+        digest = hashlib.sha1()
+        for row in rows:
+            digest.update(f"{table.path(row)}\0{table.lines[row]}\0{table.encodings[row]}\0".encode('utf-8'))
+            digest.update(table.hashes[row * DIGEST_SIZE:(row + 1) * DIGEST_SIZE])
+        return digest.hexdigest()
+    
+    def source_fingerprint(self, lines_per_page: int = 50, total_pages: int = 60) -> str:
+        self._ensure_file_table()
+        plan = self._page_plan(lines_per_page, total_pages)
+        return input_digest([(section, first_page, self.rows_fingerprint(rows)) for section, rows, first_page in plan])
+    
+    def document_inputs(self, document: str, **options) -> Dict:
+        info = {key: value for key, value in self.project_info.items() if key != 'structure'}
+        inputs = {'document': document, 'template': TEMPLATE_VERSION, 'options': options,
+                  'date': datetime.now().strftime('%Y-%m-%d')}
+        
+        if document == 'source':
+            inputs.update(name=info['name'], version=info['version'], line_width=LINE_WIDTH,
+                          pages=self.source_fingerprint(**options))
+        elif document == 'skip_report':
+            inputs.update(skipped=self.skipped_files)
+        elif document == 'dedup_report':
+            inputs.update(dedup=self.dedup, count_duplicates=self.count_duplicates,
+                          duplicates=[(self.code_files.path(row), self.code_files.path(original))
+                                      for row, original in self.code_files.duplicates()])
+        elif document == 'application_form':
+            inputs.update(project_info=info, code_lines=self.count_code_lines())
+        else:
+            inputs.update(project_info=info)
+        if document in DOCUMENT_TEMPLATES:
+            from doc_templates import load_template
+            inputs['template_digest'] = load_template(DOCUMENT_TEMPLATES[document]).digest
         
-        return total_lines
+        return inputs
     
+    @profiled_phase('generate_source_code_doc')
     def generate_source_code_doc(self, output_path: str, lines_per_page: int = 50, total_pages: int = 60):
         output_file = Path(output_path)
         output_file.parent.mkdir(parents=True, exist_ok=True)
         
-        with open(output_file, 'w', encoding='utf-8') as f:
+        with atomic_open(output_file) as f:
             f.write(f"# {self.project_info['name']} 源代码文档\n\n")
             f.write(f"软件名称：{self.project_info['name']}\n")
             f.write(f"版本号：{self.project_info['version']}\n")
             f.write(f"生成日期：{datetime.now().strftime('%Y-%m-%d')}\n\n")
             f.write("---\n\n")
             
-            page_num = 1
-            line_on_page = 0
-            
-            for file_path in self.code_files:
-                if page_num > total_pages:
-                    break
+            section = None
+            for page in self._profiled_pages(lines_per_page, total_pages):
+                if page['section'] == 'tail' and section != 'tail':
+                    f.write(f"……（中间部分代码省略，以下为后{total_pages // 2}页）……\n\n")
+                section = page['section']
                 
-                full_path = self.project_path / file_path
+                for segment in page['segments']:
+                    if segment['start_line'] == 1 and segment['start_part'] == 0:
+                        f.write(f"## 文件：{segment['file']}\n")
+                        f.write(f"总行数：{segment['total_lines']}\n\n")
+                    else:
+                        f.write(f"## 文件：{segment['file']}（续）\n\n")
+                    f.write("```javascript\n")
+                    for line in segment['lines']:
+                        f.write(line + '\n')
+                    f.write("```\n\n")
                 
-                try:
-                    with open(full_path, 'r', encoding='utf-8') as source_file:
-                        lines = source_file.readlines()
-                        
-                        f.write(f"## 文件：{file_path}\n")
-                        f.write(f"总行数：{len(lines)}\n\n")
-                        f.write("```javascript\n")
-                        
-                        for line in lines:
-                            f.write(line.rstrip() + '\n')
-                            line_on_page += 1
-                            
-                            if line_on_page >= lines_per_page:
-                                f.write("```\n\n")
-                                f.write(f"--- 第 {page_num} 页 ---\n\n")
-                                page_num += 1
-                                line_on_page = 0
-                                
-                                if page_num > total_pages:
-                                    break
-                                
-                                f.write(f"## 文件：{file_path}（续）\n\n")
-                                f.write("```javascript\n")
-                        
-                        f.write("```\n\n")
-                        
-                        if line_on_page >= lines_per_page:
-                            f.write(f"--- 第 {page_num} 页 ---\n\n")
-                            page_num += 1
-                            line_on_page = 0
-                
-                except Exception as e:
-                    f.write(f"无法读取文件：{e}\n\n")
-            
-            while page_num <= total_pages:
-                f.write(f"--- 第 {page_num} 页 ---\n\n")
-                page_num += 1
+                f.write(f"--- 第 {page['number']} 页 ---\n\n")
     
-    def generate_user_manual(self, output_path: str):
+    @profiled_phase('generate_source_code_pdf')
+    def generate_source_code_pdf(self, output_path: str, font, lines_per_page: int = 50, total_pages: int = 60):
+        from pdf_writer import render_source_pdf
+        
+        output_file = Path(output_path)
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        title = f"{self.project_info['name']} V{self.project_info['version']} 源代码"
+        render_source_pdf(self._profiled_pages(lines_per_page, total_pages), str(output_file), font, title,
+                          lines_per_page)
+    
+    @profiled_phase('generate_skip_report')
+    def generate_skip_report(self, output_path: str):
         output_file = Path(output_path)
         output_file.parent.mkdir(parents=True, exist_ok=True)
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(f"# {self.project_info['name']} 用户手册\n\n")
-            f.write(f"## 一、软件简介\n\n")
-            f.write(f"{self.project_info['description']}\n\n")
-            
-            f.write("### 1.1 软件概述\n\n")
-            f.write(f"{self.project_info['name']}是一款{self.project_info['type']}，")
-            f.write(f"运行于{self.project_info['platform']}。\n\n")
-            
-            f.write("### 1.2 主要特点\n\n")
-            for feature in self.project_info['features'][:10]:
-                if feature:
-                    f.write(f"- {feature}\n")
-            f.write("\n")
-            
-            f.write("## 二、功能概述\n\n")
-            f.write("### 2.1 功能列表\n\n")
-            for i, feature in enumerate(self.project_info['features'], 1):
-                if feature:
-                    f.write(f"{i}. {feature}\n")
-            f.write("\n")
-            
-            f.write("## 三、安装/使用说明\n\n")
-            f.write("### 3.1 系统要求\n\n")
-            f.write(f"- 平台：{self.project_info['platform']}\n")
-            f.write(f"- 技术栈：{', '.join(self.project_info['tech_stack'])}\n\n")
-            
-            f.write("### 3.2 使用说明\n\n")
-            f.write("1. 打开微信客户端\n")
-            f.write("2. 搜索或扫描小程序二维码\n")
-            f.write("3. 进入小程序开始使用\n\n")
-            
-            f.write("## 四、主要功能说明\n\n")
-            for i, feature in enumerate(self.project_info['features'][:5], 1):
-                if feature:
-                    f.write(f"### 4.{i} {feature}\n\n")
-                    f.write("该功能提供了便捷的操作体验。\n\n")
-                    f.write("**操作步骤：**\n")
-                    f.write("1. 点击对应功能按钮\n")
-                    f.write("2. 按照提示进行操作\n")
-                    f.write("3. 查看操作结果\n\n")
-            
-            f.write("## 五、注意事项\n\n")
-            f.write("1. 请确保网络连接正常\n")
-            f.write("2. 首次使用可能需要授权\n")
-            f.write("3. 数据保存在本地，清除缓存会丢失数据\n\n")
-            
-            f.write("## 六、技术支持\n\n")
-            f.write(f"### 6.1 版本信息\n\n")
-            f.write(f"- 软件版本：{self.project_info['version']}\n")
-            f.write(f"- 更新日期：{datetime.now().strftime('%Y-%m-%d')}\n")
+        with atomic_open(output_file) as f:
+            f.write("# 跳过文件清单\n\n")
+            f.write("以下文件未计入代码行数，也未收录到源代码文档中。\n\n")
+            f.write("| 文件 | 原因 | 大小（字节） |\n")
+            f.write("|------|------|------|\n")
+            for file_path, reason, size in self.skipped_files:
+                f.write(f"| {file_path} | {SKIP_REASONS.get(reason, reason)} | {size} |\n")
     
-    def generate_design_doc(self, output_path: str):
+    @profiled_phase('generate_dedup_report')
+    def generate_dedup_report(self, output_path: str):
         output_file = Path(output_path)
         output_file.parent.mkdir(parents=True, exist_ok=True)
+        table = self.code_files
+        mode = '忽略空白和换行差异' if self.dedup == 'normalized' else '内容完全相同'
+        counted = '计入一次' if not self.count_duplicates else '仍计入'
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(f"# {self.project_info['name']} 设计说明书\n\n")
-            f.write("## 一、软件概述\n\n")
-            f.write("### 1.1 软件简介\n\n")
-            f.write(f"{self.project_info['description']}\n\n")
-            
-            f.write("### 1.2 开发背景\n\n")
-            f.write(f"为满足用户在{self.project_info['platform']}上的使用需求，")
-            f.write(f"开发了{self.project_info['name']}。\n\n")
-            
-            f.write("### 1.3 设计目标\n\n")
-            f.write("- 提供简洁易用的用户界面\n")
-            f.write("- 实现稳定可靠的功能\n")
-            f.write("- 优化用户体验\n\n")
-            
-            f.write("## 二、需求分析\n\n")
-            f.write("### 2.1 功能需求\n\n")
-            for i, feature in enumerate(self.project_info['features'], 1):
-                if feature:
-                    f.write(f"{i}. {feature}\n")
-            f.write("\n")
-            
-            f.write("### 2.2 性能需求\n\n")
-            f.write("- 响应时间：操作响应时间小于500ms\n")
-            f.write("- 并发支持：支持多用户同时使用\n")
-            f.write("- 资源占用：内存占用合理\n\n")
-            
-            f.write("### 2.3 安全需求\n\n")
-            f.write("- 数据加密：敏感数据加密存储\n")
-            f.write("- 权限控制：合理的权限管理\n")
-            f.write("- 防护措施：防止常见安全漏洞\n\n")
-            
-            f.write("## 三、总体设计\n\n")
-            f.write("### 3.1 系统架构\n\n")
-            f.write(f"本软件采用{self.project_info['type']}架构，")
-            f.write(f"基于{', '.join(self.project_info['tech_stack'])}开发。\n\n")
-            
-            f.write("### 3.2 模块划分\n\n")
-            f.write("软件主要包含以下模块：\n\n")
-            f.write("- 主界面模块：负责用户界面的展示和交互\n")
-            f.write("- 业务逻辑模块：处理核心业务逻辑\n")
-            f.write("- 数据存储模块：负责数据的存储和管理\n")
-            f.write("- 工具模块：提供通用工具函数\n\n")
-            
-            f.write("### 3.3 技术选型\n\n")
-            for tech in self.project_info['tech_stack']:
-                f.write(f"- {tech}\n")
-            f.write("\n")
-            
-            f.write("### 3.4 运行环境\n\n")
-            f.write(f"- 平台：{self.project_info['platform']}\n")
-            f.write(f"- 基础库版本：{self.project_info.get('lib_version', '最新')}\n\n")
-            
-            f.write("## 四、详细设计\n\n")
-            f.write("### 4.1 主界面模块\n\n")
-            f.write("#### 4.1.1 模块功能\n\n")
-            f.write("负责软件主界面的展示和用户交互。\n\n")
-            f.write("#### 4.1.2 模块接口\n\n")
-            f.write("- 页面路由接口\n")
-            f.write("- 事件处理接口\n\n")
-            
-            f.write("### 4.2 业务逻辑模块\n\n")
-            f.write("#### 4.2.1 模块功能\n\n")
-            f.write("处理软件的核心业务逻辑。\n\n")
-            f.write("#### 4.2.2 模块接口\n\n")
-            f.write("- 数据处理接口\n")
-            f.write("- 计算接口\n\n")
-            
-            f.write("## 五、数据结构设计\n\n")
-            f.write("### 5.1 数据存储\n\n")
-            f.write("使用本地存储保存用户数据。\n\n")
-            
-            f.write("### 5.2 数据格式\n\n")
-            f.write("- JSON格式存储配置信息\n")
-            f.write("- 数组格式存储历史记录\n\n")
-            
-            f.write("## 六、界面设计\n\n")
-            f.write("### 6.1 界面布局\n\n")
-            f.write("采用响应式布局，适配不同屏幕尺寸。\n\n")
-            
-            f.write("### 6.2 交互设计\n\n")
-            f.write("- 点击交互：按钮点击触发相应功能\n")
-            f.write("- 手势交互：支持滑动等手势操作\n\n")
-            
-            f.write("## 七、安全设计\n\n")
-            f.write("### 7.1 安全机制\n\n")
-            f.write("- 输入验证：对用户输入进行验证\n")
-            f.write("- 错误处理：完善的错误处理机制\n\n")
-            
-            f.write("## 八、测试设计\n\n")
-            f.write("### 8.1 测试策略\n\n")
-            f.write("-("- 单元测试：测试各个功能模块\n")
-            f.write("- 集成测试：测试模块间的交互\n")
-            f.write("- 用户测试：真实用户使用测试\n")
+        with atomic_open(output_file) as f:
+            f.write("# 去重文件清单\n\n")
+            f.write(f"以下文件与保留文件{mode}，未收录到源代码文档中；代码行数统计中重复文件{counted}。\n\n")
+            f.write("| 重复文件 | 保留文件 | 行数 |\n")
+            f.write("|------|------|------|\n")
+            for row, original in table.duplicates():
+                f.write(f"| {table.path(row)} | {table.path(original)} | {table.lines[row]} |\n")
     
-    def generate_application_form(self, output_path: str, owner_info: Optional[Dict] = None):
+    def _render_document(self, output_path: str, template_name: str, values: Dict):
+        from doc_templates import load_template
+        
         output_file = Path(output_path)
         output_file.parent.mkdir(parents=True, exist_ok=True)
+        text = load_template(template_name).render(values)
         
-        code_lines = self.count_code_lines()
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write("# 软件著作权登记申请表\n\n")
-            f.write("## 基本信息\n\n")
-            f.write("| 字段 | 内容 |\n")
-            f.write("|------|------|\n")
-            f.write(f"| 软件全称 | {self.project_info['name']} |\n")
-            f.write(f"| 软件简称 | {self.project_info['name'][:10]} |\n")
-            f.write(f"| 版本号 | V{self.project_info['version']} |\n")
-            f.write(f"| 开发完成日期 | {datetime.now().strftime('%Y-%m-%d')} |\n")
-            f.write(f"| 首次发表日期 | {datetime.now().strftime('%Y-%m-%d')} |\n\n")
-            
-            f.write("## 著作权人信息\n\n")
-            f.write("| 字段 | 内容 |\n")
-            f.write("|------|------|\n")
+        with atomic_open(output_file) as f:
+            f.write(text)
+    
+    def user_manual_values(self) -> Dict:
+        info = self.project_info
+        features = [feature for feature in info['features'] if feature]
+        today = datetime.now().strftime('%Y-%m-%d')
+        
+        install_steps = None
+        if info['type'] == '微信小程序':
+            install_steps = "1. 打开微信客户端\n2. 搜索或扫描小程序二维码\n3. 进入小程序开始使用"
+        
+        return {
+            '软件名称': info['name'],
+            '软件简介': info['description'],
+            '软件概述': f"{info['name']}是一款{info['type']}，运行于{info['platform']}。",
+            '主要特点': '\n'.join(f"- {feature}" for feature in features[:10]),
+            '功能概述': f"{info['name']}主要提供以下{len(features)}项功能。" if features else info['description'],
+            '功能列表': '\n'.join(f"{i}. {feature}" for i, feature in enumerate(features, 1)),
+            '系统要求': f"- 平台：{info['platform']}\n- 技术栈：{', '.join(info['tech_stack'])}",
+            '安装步骤': install_steps,
+            '功能名称': features[:2],
+            '功能说明': "该功能提供了便捷的操作体验。",
+            '步骤1': "点击对应功能按钮",
+            '步骤2': "按照提示进行操作",
+            '步骤3': "查看操作结果",
+            '使用注意事项': "1. 请确保网络连接正常\n2. 首次使用可能需要授权\n3. 数据保存在本地，清除缓存会丢失数据",
+            '联系方式': f"- 开发者：{info['author']}" if info['author'] else None,
+            '版本号': info['version'],
+            '更新日期': today,
+        }
+    
+    def design_doc_values(self) -> Dict:
+        info = self.project_info
+        features = [feature for feature in info['features'] if feature]
+        tech_stack = ', '.join(info['tech_stack'])
+        
+        return {
+            '软件名称': info['name'],
+            '软件简介': info['description'],
+            '开发背景': f"为满足用户在{info['platform']}上的使用需求，开发了{info['name']}。",
+            '设计目标': "- 提供简洁易用的用户界面\n- 实现稳定可靠的功能\n- 优化用户体验",
+            '功能需求': '\n'.join(f"{i}. {feature}" for i, feature in enumerate(features, 1)),
+            '性能需求': "- 响应时间：操作响应时间小于500ms\n- 并发支持：支持多用户同时使用\n- 资源占用：内存占用合理",
+            '安全需求': "- 数据加密：敏感数据加密存储\n- 权限控制：合理的权限管理\n- 防护措施：防止常见安全漏洞",
+            '系统架构说明': f"本软件采用{info['type']}架构，基于{tech_stack}开发。",
+            '模块划分': ("软件主要包含以下模块：\n\n- 主界面模块：负责用户界面的展示和交互\n"
+                     "- 业务逻辑模块：处理核心业务逻辑\n- 数据存储模块：负责数据的存储和管理\n- 工具模块：提供通用工具函数"),
+            '技术选型': '\n'.join(f"- {tech}" for tech in info['tech_stack']),
+            '运行环境': f"- 平台：{info['platform']}\n- 基础库版本：{info.get('lib_version', '最新')}",
+            '模块名称': ['主界面模块', '业务逻辑模块'],
+            '模块功能': ["负责软件主界面的展示和用户交互。", "处理软件的核心业务逻辑。"],
+            '模块接口': ["- 页面路由接口\n- 事件处理接口", "- 数据处理接口\n- 计算接口"],
+            '数据存储设计': "使用本地存储保存用户数据。",
+            '数据格式': "- JSON格式存储配置信息\n- 数组格式存储历史记录",
+            '界面布局': "采用响应式布局，适配不同屏幕尺寸。",
+            '交互设计': "- 点击交互：按钮点击触发相应功能\n- 手势交互：支持滑动等手势操作",
+            '安全机制': "- 输入验证：对用户输入进行验证\n- 错误处理：完善的错误处理机制",
+            '测试策略': "- 单元测试：测试各个功能模块\n- 集成测试：测试模块间的交互\n- 用户测试：真实用户使用测试",
+        }
+    
+    def application_form_values(self, owner_info: Optional[Dict] = None) -> Dict:
+        info = self.project_info
+        owner = owner_info or {}
+        today = datetime.now().strftime('%Y-%m-%d')
+        
+        return {
+            '软件全称': info['name'],
+            '软件简称': info['name'][:10],
+            '版本号': f"V{info['version']}",
+            '开发完成日期': today,
+            '首次发表日期': today,
+            '著作权人名称': owner.get('name'),
+            '营业执照/身份证': [owner.get('id_type'), None],
+            '证件号码': [owner.get('id_number'), None],
+            '地址': [owner.get('address'), None],
+            '邮编': [owner.get('zip_code'), None],
+            '联系人': [owner.get('contact'), None],
+            '电话': [owner.get('phone'), None],
+            '邮箱': [owner.get('email'), None],
+            '开发者名称': info['author'],
+            '原创/修改/衍生': '原创',
+            '软件分类': '移动应用软件-小程序',
+            '代码行数': self.count_code_lines(),
+            '开发环境': '微信开发者工具',
+            '运行环境': info['platform'],
+            '编程语言': 'JavaScript, WXML, WXSS',
+            '硬件要求': '智能手机',
+            '软件功能简介': '\n'.join(f"- {feature}" for feature in info['features'] if feature),
+            '备注信息': '本软件为原创开发，未使用第三方商业代码。',
+        }
+    
+    @profiled_phase('generate_user_manual')
+    def generate_user_manual(self, output_path: str):
+        self._render_document(output_path, DOCUMENT_TEMPLATES['user_manual'], self.user_manual_values())
+    
+    @profiled_phase('generate_design_doc')
+    def generate_design_doc(self, output_path: str):
+        self._render_document(output_path, DOCUMENT_TEMPLATES['design_doc'], self.design_doc_values())
+    
+    @profiled_phase('generate_application_form')
+    def generate_application_form(self, output_path: str, owner_info: Optional[Dict] = None):
+        self._render_document(output_path, DOCUMENT_TEMPLATES['application_form'],
+                              self.application_form_values(owner_info))
+
+
+def _silent(*args, **kwargs):
+    pass
+
+
+def generate_materials(project_path: str, output_dir: Optional[str] = None, owner_info: Optional[Dict] = None,
+                       options: Optional[Dict] = None, log=print, pdf: bool = False,
+                       font_path: Optional[str] = None, hooks: Iterable[Callable[[Dict], None]] = ()) -> Dict:
+    if not os.path.isdir(project_path) and not is_archive(project_path):
+        raise FileNotFoundError(f"项目路径不存在：{project_path}")
+    
+    started = time.perf_counter()
+    output_dir = output_dir or default_output_dir(project_path)
+    log = _synchronized(log)
+    generator = CopyrightDocGenerator(project_path, index_path=os.path.join(output_dir, SCAN_INDEX_NAME),
+                                      **(options or {}))
+    for hook in hooks:
+        generator.add_hook(hook)
+    
+    log("正在分析项目...")
+    project_info = generator.probe_metadata()
+    log(f"项目名称：{project_info['name']}")
+    log(f"项目版本：{project_info['version']}")
+    log(f"项目类型：{project_info['type']}")
+    
+    try:
+        failures = write_documents(generator, output_dir, BuildManifest(output_dir), owner_info,
+                                   _find_pdf_font(pdf, font_path, log), log)
+        code_lines = generator.count_code_lines()
+    finally:
+        generator.close()
+    
+    generator.emit({'event': 'summary', 'project': project_path, 'code_files': len(generator.code_files),
+                    'code_lines': code_lines, 'seconds': round(time.perf_counter() - started, 6),
+                    'failures': len(failures), **generator.metrics})
+    if failures:
+        log(f"\n{len(failures)} 份文档生成失败，其余文档已生成到：{output_dir}")
+    else:
+        log(f"\n所有文档已生成到：{output_dir}")
+    
+    return {
+        'project_path': project_path,
+        'output_dir': output_dir,
+        'name': project_info['name'],
+        'version': project_info['version'],
+        'files': len(generator.code_files),
+        'lines': code_lines,
+        'failures': failures,
+        'seconds': time.perf_counter() - started,
+    }
+
+
+def default_output_dir(project_path: str) -> str:
+    if is_archive(project_path):
+        base = os.path.basename(project_path)
+        for suffix in ('.tar.gz', '.tar.bz2', '.tar.xz'):
+            if base.lower().endswith(suffix):
+                base = base[:-len(suffix)]
+                break
+        else:
+            base = os.path.splitext(base)[0]
+        return os.path.join(os.path.dirname(os.path.abspath(project_path)), f'{base}_copyright_docs')
+    
+    return os.path.join(project_path, 'copyright_docs')
+
+
+def _synchronized(log):
+    lock = threading.Lock()
+    
+    def synchronized_log(*args):
+        with lock:
+            log(*args)
+    
+    return synchronized_log
+
+
+def _find_pdf_font(pdf: bool, font_path: Optional[str], log=print) -> Optional[str]:
+    if not pdf:
+        return None
+    
+    from pdf_writer import find_cjk_font
+    font_file = find_cjk_font(font_path)
+    if not font_file:
+        log("未找到可用的中文 TrueType 字体，跳过 PDF 生成（可使用 --font 指定字体文件）")
+    return font_file
+
+
+def write_documents(generator: CopyrightDocGenerator, output_dir: str, manifest: BuildManifest,
+                    owner_info: Optional[Dict] = None, font_file: Optional[str] = None, log=print,
+                    update_files: Optional[Callable[[], None]] = None) -> Dict[str, str]:
+    def build(label: str, file_name: str, document: str, write: Callable[..., None], with_pdf: bool = True,
+              **inputs):
+        output_path = os.path.join(output_dir, file_name)
+        digest = input_digest(generator.document_inputs(document, **inputs))
+        if manifest.is_current(output_path, digest):
+            log(f"{label}未变化，跳过")
+        else:
+            log(f"正在生成{label}...")
+            write(output_path, **inputs)
+            manifest.record(output_path, digest)
+        
+        if with_pdf and font_file and render_document_pdf(generator, output_path, font_file, manifest):
+            log(f"已生成{label} PDF")
+    
+    def remove_stale(label: str, file_name: str):
+        output_path = os.path.join(output_dir, file_name)
+        for path in (output_path, os.path.splitext(output_path)[0] + '.pdf'):
+            manifest.discard(path)
+            if os.path.exists(path):
+                os.remove(path)
+                log(f"已删除不再适用的{label}：{os.path.basename(path)}")
+    
+    with ThreadPoolExecutor(max_workers=DOCUMENT_WORKERS) as pool:
+        tasks = {
+            '用户手册': pool.submit(build, '用户手册', '用户手册.md', 'user_manual', generator.generate_user_manual),
+            '设计说明书': pool.submit(build, '设计说明书', '设计说明书.md', 'design_doc', generator.generate_design_doc),
+        }
+        
+        (update_files or generator.collect_code_files)()
+        log(f"代码文件数：{len(generator.code_files)}")
+        log(f"代码总行数：{generator.count_code_lines()}")
+        if generator.skipped_files:
+            log(f"已跳过文件数：{len(generator.skipped_files)}（详见 跳过文件清单.md）")
+            tasks['跳过文件清单'] = pool.submit(build, '跳过文件清单', '跳过文件清单.md', 'skip_report',
+                                          generator.generate_skip_report, False)
+        else:
+            remove_stale('跳过文件清单', '跳过文件清单.md')
+        duplicates = generator.code_files.duplicates()
+        if duplicates:
+            log(f"重复文件数：{len(duplicates)}（详见 去重文件清单.md）")
+            tasks['去重文件清单'] = pool.submit(build, '去重文件清单', '去重文件清单.md', 'dedup_report',
+                                          generator.generate_dedup_report, False)
+        else:
+            remove_stale('去重文件清单', '去重文件清单.md')
+        
+        tasks['源代码文档'] = pool.submit(build, '源代码文档', '源代码文档.md', 'source',
+                                      generator.generate_source_code_doc, lines_per_page=50, total_pages=60)
+        tasks['申请表'] = pool.submit(build, '申请表', '软件著作权登记申请表.md', 'application_form',
+                                   generator.generate_application_form, owner_info=owner_info)
+    
+    failures = {}
+    for label, task in tasks.items():
+        error = task.exception()
+        if error is not None:
+            failures[label] = f"{type(error).__name__}: {error}"
+            log(f"{label}生成失败：{failures[label]}")
+    manifest.save()
+    
+    return failures
+
+
+def watch_materials(project_path: str, output_dir: Optional[str] = None, owner_info: Optional[Dict] = None,
+                    options: Optional[Dict] = None, log=print, pdf: bool = False, font_path: Optional[str] = None,
+                    interval: float = WATCH_INTERVAL, hooks: Iterable[Callable[[Dict], None]] = ()):
+    if is_archive(project_path):
+        raise ValueError("监视模式不支持压缩包输入，请指定项目目录")
+    if not os.path.isdir(project_path):
+        raise FileNotFoundError(f"项目路径不存在：{project_path}")
+    
+    output_dir = output_dir or default_output_dir(project_path)
+    log = _synchronized(log)
+    generator = CopyrightDocGenerator(project_path, index_path=os.path.join(output_dir, SCAN_INDEX_NAME),
+                                      **(options or {}))
+    for hook in hooks:
+        generator.add_hook(hook)
+    manifest = BuildManifest(output_dir)
+    font_file = _find_pdf_font(pdf, font_path, log)
+    
+    log("正在分析项目...")
+    project_info = generator.probe_metadata()
+    log(f"项目名称：{project_info['name']}")
+    log(f"项目版本：{project_info['version']}")
+    log(f"项目类型：{project_info['type']}")
+    write_documents(generator, output_dir, manifest, owner_info, font_file, log)
+    log(f"\n文档已生成到：{output_dir}，正在监视文件变化（按 Ctrl+C 退出）...")
+    snapshot = generator.watch_snapshot()
+    
+    try:
+        while True:
+            time.sleep(interval)
+            current = generator.watch_snapshot()
+            changed = {path for path in snapshot.keys() | current.keys() if snapshot.get(path) != current.get(path)}
+            if not changed:
+                continue
             
-            if owner_info:
-                f.write(f"| 著作权人 | {owner_info.get('name', '')} |\n")
-                f.write(f"| 证件类型 | {owner_info.get('id_type', '')} |\n")
-                f.write(f"| 证件号码 | {owner_info.get('id_number', '')} |\n")
-                f.write(f"| 地址 | {owner_info.get('address', '')} |\n")
-                f.write(f"| 邮编 | {owner_info.get('zip_code', '')} |\n")
-                f.write(f"| 联系人 | {owner_info.get('contact', '')} |\n")
-                f.write(f"| 电话 | {owner_info.get('phone', '')} |\n")
-                f.write(f"| 邮箱 | {owner_info.get('email', '')} |\n")
+            started = time.perf_counter()
+            shown = sorted(changed)
+            log(f"\n检测到变化：{', '.join(shown[:5])}{' 等' if len(shown) > 5 else ''}")
+            if changed.intersection(METADATA_FILES):
+                generator.probe_metadata()
+            write_documents(generator, output_dir, manifest, owner_info, font_file, log,
+                            lambda: generator.refresh_files(changed))
+            after = generator.watch_snapshot()
+            snapshot = {path: current.get(path, stat) for path, stat in after.items()}
+            log(f"已更新（{time.perf_counter() - started:.2f} 秒）")
+    except KeyboardInterrupt:
+        log("\n已停止监视")
+
+
+def render_document_pdf(generator: CopyrightDocGenerator, markdown_path: str, font_file: str,
+                        manifest: Optional[BuildManifest] = None) -> bool:
+    from pdf_writer import load_font, render_markdown_pdf
+    
+    pdf_path = os.path.splitext(markdown_path)[0] + '.pdf'
+    digest = None
+    if manifest is not None and os.path.basename(markdown_path) in manifest.documents:
+        font_stat = os.stat(font_file)
+        digest = input_digest({'markdown': manifest.documents[os.path.basename(markdown_path)], 'font': font_file,
+                               'font_mtime': font_stat.st_mtime_ns, 'font_size': font_stat.st_size})
+        if manifest.is_current(pdf_path, digest):
+            return False
+    
+    font = load_font(font_file)
+    if os.path.basename(markdown_path) == '源代码文档.md':
+        generator.generate_source_code_pdf(pdf_path, font)
+    else:
+        name = os.path.splitext(os.path.basename(markdown_path))[0]
+        with generator.profile_phase(f'pdf:{name}'):
+            generator.add_metric('bytes_written', render_markdown_pdf(markdown_path, pdf_path, font))
+    if digest:
+        manifest.record(pdf_path, digest)
+    
+    return True
+
+
+def load_batch_manifest(manifest_path: str) -> List[Dict]:
+    manifest = Path(manifest_path)
+    
+    if manifest.suffix.lower() == '.csv':
+        with open(manifest, 'r', encoding='utf-8-sig', newline='') as f:
+            rows = list(csv.DictReader(f))
+        entries = []
+        for row in rows:
+            owner_info = {key[len('owner_'):]: value for key, value in row.items()
+                          if key and key.startswith('owner_') and value}
+            entries.append({
+                'project_path': row.get('project_path', ''),
+                'output_dir': row.get('output_dir') or None,
+                'owner': owner_info or None,
+            })
+    else:
+        with open(manifest, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        entries = data.get('projects', []) if isinstance(data, dict) else data
+    
+    for entry in entries:
+        if not entry.get('project_path'):
+            raise ValueError(f"清单 {manifest_path} 中存在缺少 project_path 的条目")
+        entry['project_path'] = str(manifest.parent / entry['project_path'])
+        if entry.get('output_dir'):
+            entry['output_dir'] = str(manifest.parent / entry['output_dir'])
+    
+    return entries
+
+
+def _preload_templates():
+    from doc_templates import preload_templates
+    preload_templates()
+
+
+def run_batch_entry(entry: Dict, options: Dict, pdf: bool = False, font_path: Optional[str] = None) -> Dict:
+    started = time.perf_counter()
+    try:
+        result = generate_materials(entry['project_path'], entry.get('output_dir'), entry.get('owner'),
+                                    options, log=_silent, pdf=pdf, font_path=font_path)
+        if result['failures']:
+            result['status'] = 'failed'
+            result['error'] = '；'.join(f"{label}：{error}" for label, error in result['failures'].items())
+        else:
+            result['status'] = 'ok'
+    except Exception as e:
+        result = {
+            'project_path': entry['project_path'],
+            'status': 'failed',
+            'error': f"{type(e).__name__}: {e}",
+            'seconds': time.perf_counter() - started,
+        }
+    
+    return result
+
+
+def run_batch(manifest_path: str, jobs: Optional[int] = None, options: Optional[Dict] = None,
+              summary_path: Optional[str] = None, pdf: bool = False, font_path: Optional[str] = None) -> List[Dict]:
+    entries = load_batch_manifest(manifest_path)
+    options = dict(options or {}, jobs=1)
+    results = []
+    
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count(), initializer=_preload_templates) as pool:
+        futures = [pool.submit(run_batch_entry, entry, options, pdf, font_path) for entry in entries]
+        for entry, future in zip(entries, futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {'project_path': entry['project_path'], 'status': 'failed',
+                          'error': f"{type(e).__name__}: {e}", 'seconds': 0.0}
+            results.append(result)
+            status = '完成' if result['status'] == 'ok' else f"失败（{result['error']}）"
+            print(f"[{len(results)}/{len(entries)}] {entry['project_path']}：{status}")
+    
+    summary_path = summary_path or str(Path(manifest_path).parent / '批量生成汇总.md')
+    write_batch_summary(results, summary_path)
+    
+    return results
+
+
+def write_batch_summary(results: List[Dict], summary_path: str):
+    output_file = Path(summary_path)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    
+    with atomic_open(output_file) as f:
+        f.write("# 批量生成汇总\n\n")
+        f.write(f"生成日期：{datetime.now().strftime('%Y-%m-%d')}\n\n")
+        f.write("| 项目路径 | 软件名称 | 版本号 | 代码文件数 | 代码行数 | 耗时（秒） | 状态 |\n")
+        f.write("|------|------|------|------|------|------|------|\n")
+        for result in results:
+            if result['status'] == 'ok':
+                f.write(f"| {result['project_path']} | {result['name']} | {result['version']} | "
+                        f"{result['files']} | {result['lines']} | {result['seconds']:.2f} | 成功 |\n")
             else:
-                f.write("| 著作权人 | （请填写） |\n")
-                f.write("| 证件类型 | （请填写） |\n")
-                f.write("| 证件号码 | （请填写） |\n")
-                f.write("| 地址 | （请填写） |\n")
-                f.write("| 邮编 | （请填写） |\n")
-                f.write("| 联系人 | （请填写） |\n")
-                f.write("| 电话 | （请填写） |\n")
-                f.write("| 邮箱 | （请填写） |\n")
-            f.write("\n")
-            
-            f.write("## 开发者信息\n\n")
-            f.write("| 字段 | 内容 |\n")
-            f.write("|------|------|\n")
-            f.write(f"| 开发者 | {self.project_info.get('author', '（请填写）')} |\n")
-            f.write("| 证件类型 | （请填写） |\n")
-            f.write("| 证件号码 | （请填写） |\n")
-            f.write("| 地址 | （请填写） |\n")
-            f.write("| 邮编 | （请填写） |\n")
-            f.write("| 联系人 | （请填写） |\n")
-            f.write("| 电话 | （请填写） |\n")
-            f.write("| 邮箱 | （请填写） |\n\n")
-            
-            f.write("## 软件信息\n\n")
-            f.write("| 字段 | 内容 |\n")
-            f.write("|------|------|\n")
-            f.write("| 软件性质 | 原创 |\n")
-            f.write(f"| 软件分类 | 移动应用软件-小程序 |\n")
-            f.write(f"| 代码行数 | {code_lines} |\n")
-            f.write("| 开发环境 | 微信开发者工具 |\n")
-            f.write(f"| 运行环境 | {self.project_info['platform']} |\n")
-            f.write("| 编程语言 | JavaScript, WXML, WXSS |\n")
-            f.write("| 硬件要求 | 智能手机 |\n\n")
-            
-            f.write("## 软件功能简介\n\n")
-            for feature in self.project_info['features']:
-                if feature:
-                    f.write(f"- {feature}\n")
-            f.write("\n")
-            
-            f.write("## 备注\n\n")
-            f.write("本软件为原创开发，未使用第三方商业代码。\n")
+                f.write(f"| {result['project_path']} | - | - | - | - | {result['seconds']:.2f} | "
+                        f"失败：{result['error']} |\n")
 
 
 def main():
-    import sys
+    import argparse
     
-    if len(sys.argv) < 2:
-        print("Usage: python generate_copyright_docs.py <project_path> [output_dir]")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description='生成中国软件著作权申请材料')
+    parser.add_argument('project_path', nargs='?', help='项目路径，或源码压缩包（.zip/.tar/.tar.gz 等）')
+    parser.add_argument('output_dir', nargs='?',
+                        help='输出目录（默认：<项目路径>/copyright_docs；压缩包为同目录下的 <包名>_copyright_docs）')
+    parser.add_argument('--jobs', '-j', type=int, help='并行扫描文件的工作线程/进程数；批量模式下为同时处理的项目数')
+    parser.add_argument('--executor', choices=['thread', 'process'], default='thread',
+                        help='并行扫描方式：线程池（默认）或进程池')
+    parser.add_argument('--no-gitignore', action='store_true', help='不读取项目中的 .gitignore 规则')
+    parser.add_argument('--exclude-from', metavar='FILE', help='额外的排除规则文件（.gitignore 语法）')
+    parser.add_argument('--git-ls-files', action='store_true',
+                        help='项目是 git 仓库时，使用 git ls-files 获取文件列表')
+    parser.add_argument('--max-file-size', type=int, default=DEFAULT_MAX_FILE_SIZE // 1024, metavar='KB',
+                        help='单个文件大小上限（KB），超过的文件将被跳过')
+    parser.add_argument('--dedup', choices=DEDUP_MODES,
+                        help='按内容去重，重复文件不收录到源代码文档：exact 为完全相同，normalized 忽略空白和换行差异')
+    parser.add_argument('--count-duplicates-once', action='store_true', help='去重时重复文件的代码行数只计一次')
+    parser.add_argument('--rev', metavar='COMMIT',
+                        help='读取 git 仓库中指定提交（分支、标签或哈希）的代码，而不是工作区文件')
+    parser.add_argument('--owner-info', metavar='FILE', help='著作权人信息 JSON 文件')
+    parser.add_argument('--pdf', action='store_true', help='同时生成 PDF 文件（内置渲染，无需外部转换工具）')
+    parser.add_argument('--font', metavar='FILE', help='PDF 使用的中文 TrueType 字体文件（.ttf/.ttc）')
+    parser.add_argument('--profile', metavar='FILE', help='将各阶段的耗时、文件数和读写字节数以 JSON Lines 格式写入文件')
+    parser.add_argument('--cprofile', metavar='FILE', help='将 cProfile 性能数据写入文件（可用 pstats 查看）')
+    parser.add_argument('--batch', metavar='MANIFEST', help='批量模式：项目清单文件（JSON 或 CSV）')
+    parser.add_argument('--summary', metavar='FILE', help='批量模式汇总表路径（默认：清单所在目录/批量生成汇总.md）')
+    parser.add_argument('--watch', action='store_true', help='监视模式：生成后持续监视项目文件，有修改时只更新受影响的文档')
+    parser.add_argument('--watch-interval', type=float, default=WATCH_INTERVAL, metavar='SECONDS',
+                        help=f'监视模式的轮询间隔（秒，默认 {WATCH_INTERVAL}）')
+    args = parser.parse_args()
     
-    project_path = sys.argv[1]
-    output_dir = sys.argv[2] if len(sys.argv) > 2 else os.path.join(project_path, 'copyright_docs')
+    options = {
+        'executor': args.executor,
+        'use_gitignore': not args.no_gitignore,
+        'exclude_file': args.exclude_from,
+        'git_ls_files': args.git_ls_files,
+        'max_file_size': args.max_file_size * 1024,
+        'dedup': args.dedup,
+        'count_duplicates': not args.count_duplicates_once,
+        'rev': args.rev,
+    }
     
-    generator = CopyrightDocGenerator(project_path)
+    if args.batch:
+        results = run_batch(args.batch, args.jobs, options, args.summary, args.pdf, args.font)
+        failed = [result for result in results if result['status'] != 'ok']
+        print(f"\n批量生成完成：成功 {len(results) - len(failed)} 个，失败 {len(failed)} 个")
+        sys.exit(1 if failed else 0)
     
-    print("正在分析项目...")
-    project_info = generator.analyze_project()
-    print(f"项目名称：{project_info['name']}")
-    print(f"项目版本：{project_info['version']}")
-    print(f"项目类型：{project_info['type']}")
-    print(f"代码文件数：{len(generator.code_files)}")
-    print(f"代码总行数：{generator.count_code_lines()}")
+    if not args.project_path:
+        parser.error('请指定项目路径，或使用 --batch 指定项目清单')
+    if not os.path.isdir(args.project_path) and not is_archive(args.project_path):
+        parser.error(f"项目路径不存在：{args.project_path}")
+    if args.watch and is_archive(args.project_path):
+        parser.error('监视模式不支持压缩包输入，请指定项目目录')
+    if args.rev and (args.watch or is_archive(args.project_path)):
+        parser.error('--rev 需要指定 git 仓库目录，且不能与 --watch 同时使用')
+    if args.rev:
+        try:
+            resolve_revision(args.project_path, args.rev)
+        except (ValueError, RuntimeError) as e:
+            parser.error(str(e))
     
-    print("\n正在生成源代码文档...")
-    generator.generate_source_code_doc(os.path.join(output_dir, '源代码文档.md'))
+    owner_info = None
+    if args.owner_info:
+        with open(args.owner_info, 'r', encoding='utf-8') as f:
+            owner_info = json.load(f)
     
-    print("正在生成用户手册...")
-    generator.generate_user_manual(os.path.join(output_dir, '用户手册.md'))
+    options['jobs'] = args.jobs or 1
+    hooks = []
+    if args.profile:
+        hooks.append(JsonLinesProfiler(args.profile))
     
-    print("正在生成设计说明书...")
-    generator.generate_design_doc(os.path.join(output_dir, '设计说明书.md'))
+    profiler = None
+    if args.cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
     
-    print("正在生成申请表...")
-    generator.generate_application_form(os.path.join(output_dir, '软件著作权登记申请表.md'))
+    try:
+        if args.watch:
+            watch_materials(args.project_path, args.output_dir, owner_info, options, pdf=args.pdf,
+                            font_path=args.font, interval=args.watch_interval, hooks=hooks)
+            return
+        result = generate_materials(args.project_path, args.output_dir, owner_info, options, pdf=args.pdf,
+                                    font_path=args.font, hooks=hooks)
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(args.cprofile)
+        for hook in hooks:
+            hook.close()
     
-    print(f"\n所有文档已生成到：{output_dir}")
+    if result['failures']:
+        sys.exit(1)
 
 
 if __name__ == '__main__':
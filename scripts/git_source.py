@@ -0,0 +1,88 @@
+import io
+import os
+import subprocess
+import threading
+from typing import BinaryIO, List, Optional
+
+BLOB_INDEX_NAME = os.path.join('copyright-docs', 'blob_index.json')
+
+
+def run_git(repo_path, rev: str, *args: str) -> bytes:
+    try:
+        result = subprocess.run(['git', '-C', str(repo_path), *args], capture_output=True, check=True)
+    except OSError as e:
+        raise RuntimeError(f"无法运行 git：{e}") from e
+    except subprocess.CalledProcessError as e:
+        message = e.stderr.decode('utf-8', errors='replace').strip()
+        raise ValueError(f"无法读取 git 版本 {rev}：{message}") from e
+    return result.stdout
+
+
+def resolve_revision(repo_path, rev: str) -> str:
+    return run_git(repo_path, rev, 'rev-parse', '--verify', '--end-of-options', f'{rev}^{{commit}}').decode().strip()
+
+
+class GitRevisionSource:
+    def __init__(self, repo_path, rev: str):
+        self.repo_path = str(repo_path)
+        self.rev = rev
+        self.commit = resolve_revision(self.repo_path, rev)
+        git_dir = self._git('rev-parse', '--git-common-dir').decode().strip()
+        self.cache_path = os.path.join(self.repo_path, git_dir, BLOB_INDEX_NAME)
+        self.prefix = os.fsencode(self._git('rev-parse', '--show-prefix').decode().rstrip('\n'))
+        self.members = {}
+        self._process = None
+        self._lock = threading.Lock()
+        
+        pathspec = [os.fsdecode(self.prefix)] if self.prefix else []
+        for record in self._git('ls-tree', '-r', '-z', '-l', '--full-tree', self.commit, '--', *pathspec).split(b'\0'):
+            if not record:
+                continue
+            meta, _, raw_path = record.partition(b'\t')
+            mode, object_type, sha, size = meta.split()
+            if object_type != b'blob' or mode == b'120000' or not raw_path.startswith(self.prefix):
+                continue
+            self.members[os.fsdecode(raw_path[len(self.prefix):])] = (sha.decode(), int(size))
+    
+    def _git(self, *args: str) -> bytes:
+        return run_git(self.repo_path, self.rev, *args)
+    
+    def list_files(self) -> List[str]:
+        return list(self.members)
+    
+    def size(self, name: str) -> int:
+        return self.members[name][1]
+    
+    def cache_key(self, name: str) -> Optional[str]:
+        return self.members[name][0]
+    
+    def open(self, name: str) -> BinaryIO:
+        return io.BytesIO(self._cat_blob(self.members[name][0]))
+    
+    def read(self, name: str) -> Optional[bytes]:
+        if name not in self.members:
+            return None
+        return self._cat_blob(self.members[name][0])
+    
+    def _cat_blob(self, sha: str) -> bytes:
+        with self._lock:
+            if self._process is None:
+                self._process = subprocess.Popen(['git', '-C', self.repo_path, 'cat-file', '--batch'],
+                                                 stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+            self._process.stdin.write(f'{sha}\n'.encode())
+            self._process.stdin.flush()
+            
+            header = self._process.stdout.readline().split()
+            if len(header) != 3 or header[1] != b'blob':
+                raise ValueError(f"git cat-file 无法读取对象：{sha}")
+            data = self._process.stdout.read(int(header[2]))
+            self._process.stdout.read(1)
+            return data
+    
+    def close(self):
+        with self._lock:
+            if self._process is not None:
+                self._process.stdin.close()
+                self._process.wait()
+                self._process.stdout.close()
+                self._process = None
@@ -0,0 +1,501 @@
+#!/usr/bin/env python3
+import os
+import mmap
+import re
+import struct
+import zlib
+import hashlib
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+A4 = (595.28, 841.89)
+FONT_ENV_VAR = 'COPYRIGHT_PDF_FONT'
+FONT_SEARCH_PATHS = [
+    '/usr/share/fonts/truetype/wqy/wqy-microhei.ttc',
+    '/usr/share/fonts/wqy-microhei/wqy-microhei.ttc',
+    '/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc',
+    '/usr/share/fonts/wqy-zenhei/wqy-zenhei.ttc',
+    '/usr/share/fonts/truetype/droid/DroidSansFallbackFull.ttf',
+    '/usr/share/fonts/google-droid/DroidSansFallbackFull.ttf',
+    '/usr/share/fonts/truetype/arphic/uming.ttc',
+    '/System/Library/Fonts/STHeiti Light.ttc',
+    '/System/Library/Fonts/STHeiti Medium.ttc',
+    '/Library/Fonts/Arial Unicode.ttf',
+    'C:/Windows/Fonts/simhei.ttf',
+    'C:/Windows/Fonts/simsun.ttc',
+    'C:/Windows/Fonts/msyh.ttc',
+]
+SUBSET_TABLES = ('head', 'hhea', 'maxp', 'hmtx', 'loca', 'glyf', 'cvt ', 'fpgm', 'prep')
+TAB_WIDTH = 4
+
+
+def _checksum(data: bytes) -> int:
+    padded = data + b'\0' * (-len(data) % 4)
+    return sum(struct.unpack(f'>{len(padded) // 4}I', padded)) & 0xFFFFFFFF
+
+
+def _composite_components(data: bytes) -> Iterator[int]:
+    offset = 10
+    while True:
+        flags, glyph_id = struct.unpack('>HH', data[offset:offset + 4])
+        yield glyph_id
+        offset += 4
+        offset += 4 if flags & 0x0001 else 2
+        if flags & 0x0008:
+            offset += 2
+        elif flags & 0x0040:
+            offset += 4
+        elif flags & 0x0080:
+            offset += 8
+        if not flags & 0x0020:
+            break
+
+
+class TrueTypeFont:
+    def __init__(self, path: str, font_index: int = 0):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        offset = 0
+        if self.data[:4] == b'ttcf':
+            num_fonts = struct.unpack('>I', self.data[8:12])[0]
+            if font_index >= num_fonts:
+                raise ValueError(f"{path} 中没有第 {font_index} 个字体")
+            offset = struct.unpack('>I', self.data[12 + 4 * font_index:16 + 4 * font_index])[0]
+        
+        self.tables = {}
+        num_tables = struct.unpack('>H', self.data[offset + 4:offset + 6])[0]
+        for i in range(num_tables):
+            record = self.data[offset + 12 + 16 * i:offset + 28 + 16 * i]
+            tag, _, table_offset, length = struct.unpack('>4sIII', record)
+            self.tables[tag.decode('latin-1')] = (table_offset, length)
+        
+        if 'glyf' not in self.tables or 'loca' not in self.tables:
+            raise ValueError(f"{path} 不是 TrueType 轮廓字体（暂不支持 CFF/OTF 字体）")
+        
+        head = self.table('head')
+        self.units_per_em = struct.unpack('>H', head[18:20])[0]
+        self.bbox = struct.unpack('>4h', head[36:44])
+        self.long_loca = struct.unpack('>h', head[50:52])[0] == 1
+        
+        hhea = self.table('hhea')
+        self.ascent, self.descent = struct.unpack('>hh', hhea[4:8])
+        num_h_metrics = struct.unpack('>H', hhea[34:36])[0]
+        self.num_glyphs = struct.unpack('>H', self.table('maxp')[4:6])[0]
+        
+        hmtx = self.table('hmtx')
+        self.advances = list(struct.unpack(f'>{num_h_metrics * 2}H', hmtx[:num_h_metrics * 4])[::2])
+        self.advances += [self.advances[-1]] * (self.num_glyphs - num_h_metrics)
+        
+        self.cmap = self._parse_cmap()
+        self.name = self._parse_name()
+    
+    def table(self, tag: str) -> bytes:
+        offset, length = self.tables[tag]
+        return self.data[offset:offset + length]
+    
+    def _parse_cmap(self) -> Dict[int, int]:
+        cmap = self.table('cmap')
+        num_tables = struct.unpack('>H', cmap[2:4])[0]
+        subtables = {}
+        for i in range(num_tables):
+            platform_id, encoding_id, offset = struct.unpack('>HHI', cmap[4 + 8 * i:12 + 8 * i])
+            subtables[(platform_id, encoding_id)] = offset
+        
+        for key in ((3, 10), (0, 6), (0, 4), (3, 1), (0, 3), (0, 1), (0, 0)):
+            if key not in subtables:
+                continue
+            offset = subtables[key]
+            fmt = struct.unpack('>H', cmap[offset:offset + 2])[0]
+            if fmt == 12:
+                return self._parse_cmap_format12(cmap, offset)
+            if fmt == 4:
+                return self._parse_cmap_format4(cmap, offset)
+        
+        raise ValueError(f"{self.path} 缺少可用的 Unicode cmap 表")
+    
+    @staticmethod
+    def _parse_cmap_format12(cmap: bytes, offset: int) -> Dict[int, int]:
+        num_groups = struct.unpack('>I', cmap[offset + 12:offset + 16])[0]
+        mapping = {}
+        for i in range(num_groups):
+            start, end, glyph = struct.unpack('>III', cmap[offset + 16 + 12 * i:offset + 28 + 12 * i])
+            for code in range(start, end + 1):
+                mapping[code] = glyph + code - start
+        return mapping
+    
+    @staticmethod
+    def _parse_cmap_format4(cmap: bytes, offset: int) -> Dict[int, int]:
+        seg_count = struct.unpack('>H', cmap[offset + 6:offset + 8])[0] // 2
+        ends_at = offset + 14
+        starts_at = ends_at + 2 * seg_count + 2
+        deltas_at = starts_at + 2 * seg_count
+        range_offsets_at = deltas_at + 2 * seg_count
+        ends = struct.unpack(f'>{seg_count}H', cmap[ends_at:ends_at + 2 * seg_count])
+        starts = struct.unpack(f'>{seg_count}H', cmap[starts_at:starts_at + 2 * seg_count])
+        deltas = struct.unpack(f'>{seg_count}h', cmap[deltas_at:deltas_at + 2 * seg_count])
+        range_offsets = struct.unpack(f'>{seg_count}H', cmap[range_offsets_at:range_offsets_at + 2 * seg_count])
+        
+        mapping = {}
+        for i in range(seg_count):
+            if starts[i] == 0xFFFF:
+                continue
+            for code in range(starts[i], ends[i] + 1):
+                if range_offsets[i] == 0:
+                    glyph = (code + deltas[i]) & 0xFFFF
+                else:
+                    address = range_offsets_at + 2 * i + range_offsets[i] + 2 * (code - starts[i])
+                    glyph = struct.unpack('>H', cmap[address:address + 2])[0]
+                    if glyph:
+                        glyph = (glyph + deltas[i]) & 0xFFFF
+                if glyph:
+                    mapping[code] = glyph
+        return mapping
+    
+    def _parse_name(self) -> str:
+        if 'name' in self.tables:
+            name = self.table('name')
+            count, string_offset = struct.unpack('>HH', name[2:6])
+            for i in range(count):
+                platform_id, _, _, name_id, length, offset = struct.unpack('>6H', name[6 + 12 * i:18 + 12 * i])
+                if name_id != 6:
+                    continue
+                raw = name[string_offset + offset:string_offset + offset + length]
+                value = raw.decode('utf-16-be', 'ignore') if platform_id in (0, 3) else raw.decode('latin-1')
+                value = re.sub(r'[^A-Za-z0-9-]', '', value)
+                if value:
+                    return value
+        return 'CJKFont'
+    
+    def glyph_id(self, char: str) -> int:
+        return self.cmap.get(ord(char), 0)
+    
+    def advance(self, glyph_id: int) -> float:
+        return self.advances[glyph_id] * 1000 / self.units_per_em
+    
+    def _loca(self) -> Tuple[int, ...]:
+        loca = self.table('loca')
+        if self.long_loca:
+            return struct.unpack(f'>{self.num_glyphs + 1}I', loca[:4 * (self.num_glyphs + 1)])
+        return tuple(value * 2 for value in struct.unpack(f'>{self.num_glyphs + 1}H', loca[:2 * (self.num_glyphs + 1)]))
+    
+    def subset(self, glyph_ids: Iterable[int]) -> bytes:
+        loca = self._loca()
+        glyf_offset = self.tables['glyf'][0]
+        keep = set(glyph_ids) | {0}
+        pending = list(keep)
+        while pending:
+            glyph_id = pending.pop()
+            start, end = loca[glyph_id], loca[glyph_id + 1]
+            if end - start < 10:
+                continue
+            data = self.data[glyf_offset + start:glyf_offset + end]
+            if struct.unpack('>h', data[:2])[0] < 0:
+                for component in _composite_components(data):
+                    if component not in keep and component < self.num_glyphs:
+                        keep.add(component)
+                        pending.append(component)
+        
+        glyf = bytearray()
+        offsets = []
+        for glyph_id in range(self.num_glyphs):
+            offsets.append(len(glyf))
+            if glyph_id in keep:
+                glyf += self.data[glyf_offset + loca[glyph_id]:glyf_offset + loca[glyph_id + 1]]
+                glyf += b'\0' * (-len(glyf) % 4)
+        offsets.append(len(glyf))
+        
+        head = bytearray(self.table('head'))
+        head[8:12] = b'\0\0\0\0'
+        head[50:52] = struct.pack('>h', 1)
+        
+        tables = {tag: self.table(tag) for tag in SUBSET_TABLES if tag in self.tables}
+        tables['head'] = bytes(head)
+        tables['loca'] = struct.pack(f'>{len(offsets)}I', *offsets)
+        tables['glyf'] = bytes(glyf)
+        
+        return self._build_sfnt(tables)
+    
+    @staticmethod
+    def _build_sfnt(tables: Dict[str, bytes]) -> bytes:
+        tags = sorted(tables)
+        num_tables = len(tags)
+        entry_selector = max(num_tables.bit_length() - 1, 0)
+        search_range = (2 ** entry_selector) * 16
+        header = struct.pack('>IHHHH', 0x00010000, num_tables, search_range, entry_selector,
+                             num_tables * 16 - search_range)
+        
+        directory = bytearray()
+        body = bytearray()
+        offset = 12 + 16 * num_tables
+        head_offset = 0
+        for tag in tags:
+            data = tables[tag]
+            if tag == 'head':
+                head_offset = offset + len(body)
+            directory += struct.pack('>4sIII', tag.encode('latin-1'), _checksum(data), offset + len(body), len(data))
+            body += data + b'\0' * (-len(data) % 4)
+        
+        font = bytearray(header + directory + body)
+        adjustment = (0xB1B0AFBA - _checksum(bytes(font))) & 0xFFFFFFFF
+        font[head_offset + 8:head_offset + 12] = struct.pack('>I', adjustment)
+        
+        return bytes(font)
+
+
+def find_cjk_font(font_path: Optional[str] = None) -> Optional[str]:
+    candidates = [font_path, os.environ.get(FONT_ENV_VAR)] + FONT_SEARCH_PATHS
+    for candidate in candidates:
+        if candidate and os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+@lru_cache(maxsize=None)
+def load_font(font_path: str) -> TrueTypeFont:
+    return TrueTypeFont(font_path)
+
+
+class PdfWriter:
+    CATALOG_ID = 1
+    PAGES_ID = 2
+    FONT_ID = 3
+    CID_FONT_ID = 4
+    DESCRIPTOR_ID = 5
+    FONT_FILE_ID = 6
+    TO_UNICODE_ID = 7
+    
+    def __init__(self, path: str, font: TrueTypeFont, page_size: Tuple[float, float] = A4):
+        self.path = path
+        self.font = font
+        self.page_width, self.page_height = page_size
+        self.offsets = {}
+        self.page_ids = []
+        self.used_glyphs = {}
+        self.next_id = self.TO_UNICODE_ID + 1
+        self.bytes_written = 0
+        
+        temp_path = path + '.tmp'
+        self.temp_path = temp_path
+        self.file = open(temp_path, 'wb')
+        self._write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    
+    def __enter__(self) -> 'PdfWriter':
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.file.close()
+            os.remove(self.temp_path)
+    
+    def _write(self, data: bytes):
+        self.file.write(data)
+        self.bytes_written += len(data)
+    
+    def _new_id(self) -> int:
+        obj_id = self.next_id
+        self.next_id += 1
+        return obj_id
+    
+    def _write_object(self, obj_id: int, body: str):
+        self.offsets[obj_id] = self.bytes_written
+        self._write(f'{obj_id} 0 obj\n{body}\nendobj\n'.encode('latin-1'))
+    
+    def _write_stream(self, obj_id: int, data: bytes, extra: str = ''):
+        compressed = zlib.compress(data)
+        self.offsets[obj_id] = self.bytes_written
+        self._write(f'{obj_id} 0 obj\n<< /Length {len(compressed)} /Filter /FlateDecode{extra} >>\nstream\n'
+                    .encode('latin-1'))
+        self._write(compressed)
+        self._write(b'\nendstream\nendobj\n')
+    
+    def encode(self, text: str) -> str:
+        codes = []
+        for char in text:
+            glyph_id = self.font.glyph_id(char)
+            self.used_glyphs.setdefault(glyph_id, char)
+            codes.append(f'{glyph_id:04X}')
+        return ''.join(codes)
+    
+    def text_width(self, text: str, size: float) -> float:
+        return sum(self.font.advance(self.font.glyph_id(char)) for char in text) * size / 1000
+    
+    def add_page(self, items: Iterable[Tuple[float, float, float, str]]):
+        content = ['BT']
+        for x, y, size, text in items:
+            text = text.expandtabs(TAB_WIDTH)
+            if text:
+                content.append(f'/F1 {size:g} Tf 1 0 0 1 {x:.2f} {y:.2f} Tm <{self.encode(text)}> Tj')
+        content.append('ET')
+        
+        content_id = self._new_id()
+        page_id = self._new_id()
+        self._write_stream(content_id, '\n'.join(content).encode('latin-1'))
+        self._write_object(page_id, f'<< /Type /Page /Parent {self.PAGES_ID} 0 R '
+                                    f'/MediaBox [0 0 {self.page_width:.2f} {self.page_height:.2f}] '
+                                    f'/Resources << /Font << /F1 {self.FONT_ID} 0 R >> >> '
+                                    f'/Contents {content_id} 0 R >>')
+        self.page_ids.append(page_id)
+    
+    def _write_font(self):
+        glyph_ids = sorted(self.used_glyphs)
+        tag = ''.join(chr(ord('A') + b % 26) for b in hashlib.md5(str(glyph_ids).encode()).digest()[:6])
+        base_font = f'{tag}+{self.font.name}'
+        font_file = self.font.subset(glyph_ids)
+        scale = 1000 / self.font.units_per_em
+        bbox = ' '.join(str(round(value * scale)) for value in self.font.bbox)
+        widths = ' '.join(f'{glyph_id} [{round(self.font.advance(glyph_id))}]' for glyph_id in glyph_ids)
+        
+        self._write_object(self.FONT_ID, f'<< /Type /Font /Subtype /Type0 /BaseFont /{base_font} '
+                                         f'/Encoding /Identity-H /DescendantFonts [{self.CID_FONT_ID} 0 R] '
+                                         f'/ToUnicode {self.TO_UNICODE_ID} 0 R >>')
+        self._write_object(self.CID_FONT_ID, f'<< /Type /Font /Subtype /CIDFontType2 /BaseFont /{base_font} '
+                                             f'/CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) '
+                                             f'/Supplement 0 >> /FontDescriptor {self.DESCRIPTOR_ID} 0 R '
+                                             f'/DW 1000 /W [{widths}] /CIDToGIDMap /Identity >>')
+        self._write_object(self.DESCRIPTOR_ID, f'<< /Type /FontDescriptor /FontName /{base_font} /Flags 4 '
+                                               f'/FontBBox [{bbox}] /ItalicAngle 0 '
+                                               f'/Ascent {round(self.font.ascent * scale)} '
+                                               f'/Descent {round(self.font.descent * scale)} '
+                                               f'/CapHeight {round(self.font.ascent * scale)} /StemV 80 '
+                                               f'/FontFile2 {self.FONT_FILE_ID} 0 R >>')
+        self._write_stream(self.FONT_FILE_ID, font_file, f' /Length1 {len(font_file)}')
+        self._write_stream(self.TO_UNICODE_ID, self._to_unicode_cmap(glyph_ids))
+    
+    def _to_unicode_cmap(self, glyph_ids: List[int]) -> bytes:
+        lines = [
+            '/CIDInit /ProcSet findresource begin',
+            '12 dict begin',
+            'begincmap',
+            '/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def',
+            '/CMapName /Adobe-Identity-UCS def',
+            '/CMapType 2 def',
+            '1 begincodespacerange',
+            '<0000> <FFFF>',
+            'endcodespacerange',
+        ]
+        mapped = [glyph_id for glyph_id in glyph_ids if glyph_id]
+        for start in range(0, len(mapped), 100):
+            chunk = mapped[start:start + 100]
+            lines.append(f'{len(chunk)} beginbfchar')
+            for glyph_id in chunk:
+                unicode_hex = self.used_glyphs[glyph_id].encode('utf-16-be').hex().upper()
+                lines.append(f'<{glyph_id:04X}> <{unicode_hex}>')
+            lines.append('endbfchar')
+        lines += ['endcmap', 'CMapName currentdict /CMap defineresource pop', 'end', 'end']
+        return '\n'.join(lines).encode('latin-1')
+    
+    def close(self):
+        self._write_font()
+        kids = ' '.join(f'{page_id} 0 R' for page_id in self.page_ids)
+        self._write_object(self.PAGES_ID, f'<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>')
+        self._write_object(self.CATALOG_ID, f'<< /Type /Catalog /Pages {self.PAGES_ID} 0 R >>')
+        
+        xref_offset = self.bytes_written
+        xref = [f'xref\n0 {self.next_id}\n', '0000000000 65535 f \n']
+        for obj_id in range(1, self.next_id):
+            xref.append(f'{self.offsets[obj_id]:010d} 00000 n \n')
+        xref.append(f'trailer\n<< /Size {self.next_id} /Root {self.CATALOG_ID} 0 R >>\n'
+                    f'startxref\n{xref_offset}\n%%EOF\n')
+        self._write(''.join(xref).encode('latin-1'))
+        self.file.close()
+        os.replace(self.temp_path, self.path)
+
+
+def render_source_pdf(pages: Iterable[Dict], pdf_path: str, font: TrueTypeFont, title: str,
+                      lines_per_page: int = 50, font_size: float = 9) -> int:
+    with PdfWriter(pdf_path, font) as writer:
+        top = writer.page_height - 70
+        leading = (top - 60) / lines_per_page
+        
+        for page in pages:
+            file_path = page['segments'][0]['file'] if page['segments'] else ''
+            items = [(50, writer.page_height - 40, 9, title)]
+            if file_path:
+                items.append((writer.page_width - 50 - writer.text_width(file_path, 8),
+                              writer.page_height - 40, 8, file_path))
+            
+            y = top
+            for segment in page['segments']:
+                for line in segment['lines']:
+                    items.append((50, y, font_size, line))
+                    y -= leading
+            
+            footer = f"第 {page['number']} 页"
+            items.append(((writer.page_width - writer.text_width(footer, 9)) / 2, 30, 9, footer))
+            writer.add_page(items)
+    
+    return writer.bytes_written
+
+
+MARKDOWN_SIZES = {1: 18, 2: 14, 3: 12, 4: 11}
+
+
+def _markdown_blocks(lines: Iterable[str]) -> Iterator[Tuple[float, str]]:
+    for raw_line in lines:
+        line = raw_line.rstrip('\n')
+        stripped = line.strip()
+        if stripped.startswith('```') or re.fullmatch(r'\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?', stripped or 'x'):
+            continue
+        
+        heading = re.match(r'^(#{1,6})\s+(.*)$', stripped)
+        if heading:
+            yield MARKDOWN_SIZES.get(len(heading.group(1)), 10.5), heading.group(2)
+            continue
+        
+        if stripped.startswith('|'):
+            line = '    '.join(cell.strip() for cell in stripped.strip('|').split('|'))
+        yield 10.5, line.replace('**', '').replace('`', '')
+
+
+def _wrap(writer: PdfWriter, text: str, size: float, width: float) -> List[str]:
+    if not text:
+        return ['']
+    
+    lines = []
+    current = ''
+    current_width = 0.0
+    for char in text.expandtabs(TAB_WIDTH):
+        char_width = writer.font.advance(writer.font.glyph_id(char)) * size / 1000
+        if current and current_width + char_width > width:
+            lines.append(current)
+            current = ''
+            current_width = 0.0
+        current += char
+        current_width += char_width
+    lines.append(current)
+    
+    return lines
+
+
+def render_markdown_pdf(md_path: str, pdf_path: str, font: TrueTypeFont) -> int:
+    with PdfWriter(pdf_path, font) as writer, open(md_path, 'r', encoding='utf-8') as source:
+        width = writer.page_width - 100
+        top = writer.page_height - 60
+        bottom = 60
+        items = []
+        y = top
+        page_num = 1
+        
+        def flush_page():
+            footer = f"第 {page_num} 页"
+            items.append(((writer.page_width - writer.text_width(footer, 9)) / 2, 30, 9, footer))
+            writer.add_page(items)
+        
+        for size, text in _markdown_blocks(source):
+            leading = size * 1.6
+            for line in _wrap(writer, text, size, width):
+                if y - leading < bottom:
+                    flush_page()
+                    items = []
+                    y = top
+                    page_num += 1
+                y -= leading
+                items.append((50, y, size, line))
+        
+        flush_page()
+    
+    return writer.bytes_written
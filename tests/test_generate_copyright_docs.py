@@ -0,0 +1,187 @@
+import io
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+from generate_copyright_docs import (SCAN_CHUNK_SIZE, CopyrightDocGenerator, IgnoreRules, char_width, fit_width,
+                                     glob_to_regex, layout_stream)
+
+
+def test_glob_to_regex_wildcards_stay_within_a_directory():
+    regex = re.compile('^' + glob_to_regex('*.js') + '$')
+    assert regex.match('app.js')
+    assert not regex.match('pages/app.js')
+    assert re.match('^' + glob_to_regex('file?.[ch]') + '$', 'file1.c')
+    assert not re.match('^' + glob_to_regex('file[!0-9].c') + '$', 'file1.c')
+
+
+def test_glob_to_regex_double_star():
+    regex = re.compile('^' + glob_to_regex('src/**/test.js') + '$')
+    assert regex.match('src/test.js')
+    assert regex.match('src/a/b/test.js')
+    assert not regex.match('lib/test.js')
+
+
+def test_ignore_rules_anchoring():
+    rules = IgnoreRules(['/build', 'logs'])
+    assert rules.match('build', True)
+    assert rules.match('src/build', True) is None
+    assert rules.match('logs', True)
+    assert rules.match('src/logs', True)
+
+
+def test_ignore_rules_dir_only():
+    rules = IgnoreRules(['tmp/'])
+    assert rules.match('tmp', True)
+    assert rules.match('a/tmp', True)
+    assert rules.match('tmp', False) is None
+
+
+def test_ignore_rules_negation_last_match_wins():
+    rules = IgnoreRules(['*.log', '!keep.log', 'debug/'])
+    assert rules.match('error.log', False)
+    assert rules.match('keep.log', False) is False
+    assert rules.match('a/keep.log', False) is False
+    assert rules.match('debug', True)
+    assert rules.match('debug', False) is None
+
+
+def test_ignore_rules_skip_comments_and_escapes():
+    rules = IgnoreRules(['# comment', '', '\\#notes', 'trailing   '])
+    assert len(rules.rules) == 2
+    assert rules.match('#notes', False)
+    assert rules.match('trailing', False)
+
+
+def layout(text, width=10, encoding='utf-8'):
+    return list(layout_stream(io.BytesIO(text.encode(encoding) if isinstance(text, str) else text), encoding, width))
+
+
+def test_char_width():
+    assert char_width('a') == 1
+    assert char_width('中') == 2
+    assert char_width('，') == 2
+    assert char_width('\t') == 4
+    assert char_width('\u0301') == 0
+
+
+def test_fit_width_counts_full_width_characters():
+    assert fit_width('abcdef', 0, 4) == (4, 4)
+    assert fit_width('中文字', 0, 5) == (2, 4)
+    assert fit_width('a中b', 1, 2) == (2, 2)
+    assert fit_width('\t\tx', 0, 6) == (1, 4)
+
+
+def test_layout_keeps_short_lines():
+    assert layout('a = 1;  \nb\n') == [(1, 0, 'a = 1;'), (2, 0, 'b')]
+    assert layout('a\n\nb') == [(1, 0, 'a'), (2, 0, ''), (3, 0, 'b')]
+
+
+def test_layout_wraps_long_lines():
+    assert layout('abcdefghijklmnopqrstuvwxy\n') == [(1, 0, 'abcdefghij'), (1, 1, 'klmnopqrst'), (1, 2, 'uvwxy')]
+    assert layout('0123456789\n') == [(1, 0, '0123456789')]
+
+
+def test_layout_keeps_whitespace_at_wrap_points():
+    assert layout('0123456789   abc\n') == [(1, 0, '0123456789'), (1, 1, '   abc')]
+    assert layout('0123456789' + ' ' * 25 + 'x\n') == [(1, 0, '0123456789'), (1, 1, ' ' * 10), (1, 2, ' ' * 10),
+                                                       (1, 3, '     x')]
+    assert layout("s = 'a    b    c'\n") == [(1, 0, "s = 'a    "), (1, 1, "b    c'")]
+
+
+def test_layout_keeps_combining_marks_with_their_base():
+    assert layout('abcdefghij\u0301k\n') == [(1, 0, 'abcdefghij\u0301'), (1, 1, 'k')]
+
+
+def test_layout_wraps_by_display_width():
+    assert layout('中文中文中文\n') == [(1, 0, '中文中文中'), (1, 1, '文')]
+    assert layout('abcdefghi中\n') == [(1, 0, 'abcdefghi'), (1, 1, '中')]
+    assert layout('\t\tx\n') == [(1, 0, '\t\tx')]
+    assert layout('\t\t\tx\n') == [(1, 0, '\t\t'), (1, 1, '\tx')]
+
+
+def test_layout_strips_crlf_and_trailing_whitespace_at_wrap():
+    assert layout('0123456789\r\nnext\r\n') == [(1, 0, '0123456789'), (2, 0, 'next')]
+    assert layout('0123456789      \nx') == [(1, 0, '0123456789'), (2, 0, 'x')]
+
+
+def test_layout_handles_chunk_boundaries():
+    prefix = 'a' * (SCAN_CHUNK_SIZE - 1)
+    lines = layout(prefix + '中b\nc\n', width=SCAN_CHUNK_SIZE * 2)
+    assert lines == [(1, 0, prefix + '中b'), (2, 0, 'c')]
+    
+    data = ('中' * 50000 + '\n').encode('utf-8')
+    lines = layout(data, width=90)
+    assert len(lines) == 50000 * 2 // 90 + 1
+    assert all(line_no == 1 for line_no, _, _ in lines)
+    assert ''.join(text for _, _, text in lines) == '中' * 50000
+
+
+def test_layout_strips_bom():
+    assert layout(b'\xef\xbb\xbfabc\n', encoding='utf-8-sig') == [(1, 0, 'abc')]
+
+
+def source_pages(project, files):
+    for name, lines in files.items():
+        (project / name).write_text(''.join(f'{line}\n' for line in lines), encoding='utf-8')
+    generator = CopyrightDocGenerator(str(project))
+    generator.collect_code_files()
+    return generator, list(generator.iter_source_pages())
+
+
+def test_head_and_tail_pages(tmp_path):
+    files = {f'm{i}.js': [f'// m{i} line {j}' for j in range(1, 401)] for i in range(10)}
+    generator, pages = source_pages(tmp_path, files)
+    
+    assert [page['number'] for page in pages] == list(range(1, 61))
+    assert [page['section'] for page in pages] == ['head'] * 30 + ['tail'] * 30
+    assert all(page['line_count'] == 50 for page in pages)
+    assert all(sum(len(segment['lines']) for segment in page['segments']) == 50 for page in pages)
+    
+    assert pages[0]['segments'][0]['start_line'] == 1
+    first_tail = pages[30]['segments'][0]
+    assert first_tail['start_line'] > 1
+    assert first_tail['lines'][0] == files[first_tail['file']][first_tail['start_line'] - 1]
+    
+    last_file = generator.code_files.path(len(generator.code_files) - 1)
+    last_segment = pages[-1]['segments'][-1]
+    assert last_segment['file'] == last_file
+    assert last_segment['lines'][-1] == files[last_file][-1]
+
+
+def test_source_doc_marks_continued_tail_segment(tmp_path):
+    project = tmp_path / 'project'
+    project.mkdir()
+    files = {f'm{i}.js': [f'// m{i} line {j}' for j in range(1, 401)] for i in range(10)}
+    generator, _ = source_pages(project, files)
+    generator.project_info.update(name='测试', version='1.0.0')
+    output = tmp_path / 'source.md'
+    generator.generate_source_code_doc(str(output))
+    
+    text = output.read_text(encoding='utf-8')
+    assert text.count('--- 第 ') == 60
+    tail = text.split('……（中间部分代码省略，以下为后30页）……\n\n', 1)[1]
+    assert re.match(r'## 文件：m\d\.js（续）\n', tail)
+
+
+def test_small_project_fits_on_all_pages(tmp_path):
+    files = {'app.js': [f'const a{i} = {i};' for i in range(120)]}
+    _, pages = source_pages(tmp_path, files)
+    
+    assert [page['section'] for page in pages] == ['all'] * 3
+    assert [page['line_count'] for page in pages] == [50, 50, 20]
+
+
+def test_wrapped_lines_overflowing_sixty_pages_split_into_head_and_tail(tmp_path):
+    lines = [f'{i:05d}' + 'x' * 245 for i in range(1200)]
+    _, pages = source_pages(tmp_path, {'wide.js': lines})
+    
+    assert len(pages) == 60
+    assert [page['section'] for page in pages] == ['all'] * 30 + ['tail'] * 30
+    assert all(page['line_count'] == 50 for page in pages)
+    assert pages[0]['segments'][0]['lines'][0] == lines[0][:90]
+    last_segment = pages[-1]['segments'][-1]
+    assert last_segment['start_line'] > 1
+    assert last_segment['lines'][-1] == lines[-1][180:]
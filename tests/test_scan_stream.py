@@ -0,0 +1,82 @@
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+from generate_copyright_docs import CopyrightDocGenerator, classify_name, scan_stream, sniff_prefix
+
+
+def test_scan_stream_counts_lines():
+    assert scan_stream(io.BytesIO(b'a\nb\nc\n'))['lines'] == 3
+    assert scan_stream(io.BytesIO(b'a\nb\nc'))['lines'] == 3
+    assert scan_stream(io.BytesIO(b''))['lines'] == 0
+    assert scan_stream(io.BytesIO(b'x\n' * 100000))['lines'] == 100000
+
+
+def test_scan_stream_detects_encoding():
+    assert scan_stream(io.BytesIO('中文\n'.encode('utf-8')))['encoding'] == 'utf-8'
+    assert scan_stream(io.BytesIO(b'\xef\xbb\xbfa\n'))['encoding'] == 'utf-8-sig'
+    assert scan_stream(io.BytesIO('中文\n'.encode('gbk')))['encoding'] is None
+
+
+def test_classify_name():
+    assert classify_name('package-lock.json') == 'generated'
+    assert classify_name('vendor.min.js') == 'minified'
+    assert classify_name('app.bundle.js') == 'generated'
+    assert classify_name('app.js') is None
+
+
+def test_sniff_prefix_binary_and_minified():
+    assert sniff_prefix(b'a\0b') == 'binary'
+    assert scan_stream(io.BytesIO(b'a\0b'))['skip'] == 'binary'
+    assert sniff_prefix(b'var a=1;' * 200) == 'minified'
+    assert sniff_prefix(b'var a = 1;\n' * 200) is None
+
+
+def test_sniff_prefix_generated_headers():
+    assert sniff_prefix(b'// @generated by protoc\nvar x;\n') == 'generated'
+    assert sniff_prefix(b'// Code generated by stringer; DO NOT EDIT.\n\npackage main\n') == 'generated'
+    assert sniff_prefix(b'\xef\xbb\xbf/**\n * @generated\n */\nvar x;\n') == 'generated'
+    assert sniff_prefix(b'#!/usr/bin/env python\n# @generated\n') == 'generated'
+
+
+def test_sniff_prefix_ignores_ordinary_comments():
+    assert sniff_prefix(b'// this file is not auto-generated\nvar x;\n') is None
+    assert sniff_prefix(b'# Do not edit these values unless you know why\nA = 1\n') is None
+    assert sniff_prefix(b'var x;\n// @generated\n') is None
+
+
+def test_scan_stream_normalized_hash_ignores_whitespace():
+    first = scan_stream(io.BytesIO(b'function a() {\n  return 1;\n}\n'), normalize=True)
+    second = scan_stream(io.BytesIO(b'function  a() {\r\n\r\n\treturn 1;\r\n}'), normalize=True)
+    other = scan_stream(io.BytesIO(b'function a() {\n  return 2;\n}\n'), normalize=True)
+    assert first['norm_hash'] == second['norm_hash']
+    assert first['hash'] != second['hash']
+    assert first['norm_hash'] != other['norm_hash']
+
+
+def test_scan_stream_normalized_hash_across_chunks():
+    line = b'x = 1;    \n'
+    data = line * 20000
+    spaced = data.replace(b'    \n', b'\n\n')
+    assert len(data) > 64 * 1024
+    assert (scan_stream(io.BytesIO(data), normalize=True)['norm_hash'] ==
+            scan_stream(io.BytesIO(spaced), normalize=True)['norm_hash'])
+
+
+def test_duplicate_files_are_marked_once(tmp_path):
+    (tmp_path / 'lib').mkdir()
+    (tmp_path / 'app.js').write_text('const a = 1;\nconst b = 2;\n', encoding='utf-8')
+    (tmp_path / 'lib' / 'copy.js').write_text('const a = 1;\nconst b = 2;\n', encoding='utf-8')
+    (tmp_path / 'lib' / 'spaced.js').write_text('const  a = 1;\r\n\r\n\tconst b = 2;', encoding='utf-8')
+    
+    exact = CopyrightDocGenerator(str(tmp_path), dedup='exact')
+    exact.collect_code_files()
+    assert len(exact.code_files.duplicates()) == 1
+    assert exact.count_code_lines() == 7
+    
+    normalized = CopyrightDocGenerator(str(tmp_path), dedup='normalized', count_duplicates=False)
+    normalized.collect_code_files()
+    assert len(normalized.code_files.duplicates()) == 2
+    assert normalized.count_code_lines() == 2